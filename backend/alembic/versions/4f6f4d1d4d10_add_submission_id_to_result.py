@@ -0,0 +1,32 @@
+"""Add submission_id to result
+
+Revision ID: 4f6f4d1d4d10
+Revises: 73d774a2803f
+Create Date: 2026-10-18 11:47:52.310964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f6f4d1d4d10'
+down_revision: Union[str, Sequence[str], None] = '73d774a2803f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('results', sa.Column('submission_id', sa.String(), nullable=True))
+    op.create_unique_constraint(
+        'results_submission_id_key', 'results', ['submission_id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('results_submission_id_key', 'results', type_='unique')
+    op.drop_column('results', 'submission_id')
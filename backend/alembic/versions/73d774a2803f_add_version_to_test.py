@@ -0,0 +1,31 @@
+"""Add version to test
+
+Revision ID: 73d774a2803f
+Revises: 765ee96f515b
+Create Date: 2026-10-18 11:04:19.553120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '73d774a2803f'
+down_revision: Union[str, Sequence[str], None] = '765ee96f515b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'tests',
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tests', 'version')
@@ -0,0 +1,59 @@
+"""Store face encoding as float32 bytes
+
+Revision ID: 765ee96f515b
+Revises: 8aa19c36ceb6
+Create Date: 2026-10-18 10:12:41.208315
+
+"""
+import struct
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '765ee96f515b'
+down_revision: Union[str, Sequence[str], None] = '8aa19c36ceb6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('students', sa.Column('face_encoding_f32', sa.LargeBinary(), nullable=True))
+    # float4send() yields big-endian float32 bytes, the format the
+    # FaceEncoding column type reads back with NumPy
+    op.execute(
+        """
+        UPDATE students SET face_encoding_f32 = (
+            SELECT string_agg(float4send(x::float4), ''::bytea ORDER BY ord)
+            FROM unnest(face_encoding) WITH ORDINALITY AS t(x, ord)
+        )
+        WHERE face_encoding IS NOT NULL
+        """
+    )
+    op.drop_column('students', 'face_encoding')
+    op.alter_column('students', 'face_encoding_f32', new_column_name='face_encoding')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        'students',
+        sa.Column('face_encoding_arr', postgresql.ARRAY(sa.Float()), nullable=True),
+    )
+    # There is no SQL inverse of float4send(), so unpack the bytes here
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text("SELECT id, face_encoding FROM students WHERE face_encoding IS NOT NULL")
+    ).fetchall()
+    for student_id, packed in rows:
+        values = list(struct.unpack(f">{len(packed) // 4}f", packed))
+        conn.execute(
+            sa.text("UPDATE students SET face_encoding_arr = :values WHERE id = :id"),
+            {"values": values, "id": student_id},
+        )
+    op.drop_column('students', 'face_encoding')
+    op.alter_column('students', 'face_encoding_arr', new_column_name='face_encoding')
@@ -0,0 +1,71 @@
+"""Add position to question
+
+Revision ID: 7d6f5301faa6
+Revises: acfc8b4562ce
+Create Date: 2026-10-18 15:02:11.604381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d6f5301faa6'
+down_revision: Union[str, Sequence[str], None] = 'acfc8b4562ce'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'questions',
+        sa.Column('position', sa.Integer(), server_default='0', nullable=False),
+    )
+    # Existing tests keep the id order they were answered and scored in
+    op.execute(
+        """
+        UPDATE questions SET position = ordered.position
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY test_id ORDER BY id) - 1
+                AS position
+            FROM questions
+        ) AS ordered
+        WHERE questions.id = ordered.id
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_questions_test_id_position',
+            'questions',
+            ['test_id', 'position'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_questions_test_id_id',
+            table_name='questions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_questions_test_id_id',
+            'questions',
+            ['test_id', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_questions_test_id_position',
+            table_name='questions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('questions', 'position')
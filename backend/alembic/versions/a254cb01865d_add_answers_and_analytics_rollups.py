@@ -0,0 +1,63 @@
+"""Add answers to result and analytics rollup tables
+
+Revision ID: a254cb01865d
+Revises: 4f6f4d1d4d10
+Create Date: 2026-10-18 12:31:08.774512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a254cb01865d'
+down_revision: Union[str, Sequence[str], None] = '4f6f4d1d4d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'results',
+        sa.Column('answers', postgresql.ARRAY(sa.SmallInteger()), nullable=True),
+    )
+    op.create_table(
+        'question_option_stats',
+        sa.Column('test_id', sa.Integer(), nullable=False),
+        sa.Column('test_version', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('option', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('test_id', 'test_version', 'position', 'option'),
+    )
+    op.create_table(
+        'score_bucket_stats',
+        sa.Column('test_id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('test_id', 'bucket'),
+    )
+    # Existing results have no stored answers, but their scores can seed
+    # the histogram
+    op.execute(
+        """
+        INSERT INTO score_bucket_stats (test_id, bucket, count)
+        SELECT test_id, LEAST(FLOOR(score / 10)::int, 9), count(*)
+        FROM results
+        WHERE test_id IS NOT NULL AND score IS NOT NULL
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('score_bucket_stats')
+    op.drop_table('question_option_stats')
+    op.drop_column('results', 'answers')
@@ -0,0 +1,56 @@
+"""Sort results listing with NULL taken_at last
+
+Revision ID: aa851a90a669
+Revises: ccfadd0d6b89
+Create Date: 2026-10-18 17:12:40.381907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'aa851a90a669'
+down_revision: Union[str, Sequence[str], None] = 'ccfadd0d6b89'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SORT_TIME = sa.text("coalesce(taken_at, '-infinity'::timestamptz)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_results_sort_time_id',
+            'results',
+            [SORT_TIME, 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_results_taken_at_id',
+            table_name='results',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_results_taken_at_id',
+            'results',
+            ['taken_at', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_results_sort_time_id',
+            table_name='results',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
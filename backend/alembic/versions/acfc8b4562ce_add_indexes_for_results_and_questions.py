@@ -0,0 +1,46 @@
+"""Add indexes for results and questions
+
+Revision ID: acfc8b4562ce
+Revises: a254cb01865d
+Create Date: 2026-10-18 13:20:37.118046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'acfc8b4562ce'
+down_revision: Union[str, Sequence[str], None] = 'a254cb01865d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_tests_subject_id_id', 'tests', ['subject_id', 'id']),
+    ('ix_questions_test_id_id', 'questions', ['test_id', 'id']),
+    ('ix_results_student_id_taken_at', 'results', ['student_id', 'taken_at']),
+    ('ix_results_test_id_taken_at', 'results', ['test_id', 'taken_at']),
+    ('ix_results_taken_at_id', 'results', ['taken_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable while the indexes build,
+    # but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
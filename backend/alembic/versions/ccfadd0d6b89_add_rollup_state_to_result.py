@@ -0,0 +1,51 @@
+"""Add test_version and rollup state to result
+
+Revision ID: ccfadd0d6b89
+Revises: 7d6f5301faa6
+Create Date: 2026-10-18 15:41:52.219870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ccfadd0d6b89'
+down_revision: Union[str, Sequence[str], None] = '7d6f5301faa6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('results', sa.Column('test_version', sa.Integer(), nullable=True))
+    # Existing results were counted when they were inserted
+    op.add_column(
+        'results',
+        sa.Column('rolled_up', sa.Boolean(), server_default=sa.true(), nullable=False),
+    )
+    op.alter_column('results', 'rolled_up', server_default=sa.false())
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_results_pending_rollup',
+            'results',
+            ['id'],
+            postgresql_where=sa.text('NOT rolled_up'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_results_pending_rollup',
+            table_name='results',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('results', 'rolled_up')
+    op.drop_column('results', 'test_version')
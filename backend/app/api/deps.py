@@ -1,4 +1,4 @@
-from typing import Generator, Optional
+from typing import Generator, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
@@ -7,52 +7,76 @@ from sqlalchemy.future import select
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.metrics import JWT_SECONDS
 from app.models.user import User
 from app.models.student import Student
+from app.services.principal_cache import (
+    StudentPrincipal,
+    UserPrincipal,
+    principal_cache,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+
+def decode_token(token: str) -> Tuple[str, Optional[float]]:
+    """Return the token's subject and expiry, or raise 401."""
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
+        with JWT_SECONDS.time("decode"):
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+        sub: str = payload.get("sub")
+        if sub is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    return sub, payload.get("exp")
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> UserPrincipal:
+    cached = principal_cache.get(token)
+    if cached is not None:
+        sub = cached.sub
+    else:
+        sub, exp = decode_token(token)
 
     # Check if this is a student token
-    if username.startswith("student:"):
+    if sub.startswith("student:"):
         raise HTTPException(status_code=403, detail="Admins only")
+    if cached is not None:
+        return cached.principal
 
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
-    if user is None:
+    result = await db.execute(
+        select(User.id, User.username, User.role).where(User.username == sub)
+    )
+    row = result.first()
+    if row is None:
         raise credentials_exception
+    user = UserPrincipal(id=row.id, username=row.username, role=row.role)
+    principal_cache.set(token, sub, user, exp)
     return user
 
 
 async def get_current_teacher(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user),
+) -> UserPrincipal:
     if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     return current_user
 
 
 async def get_current_admin(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user),
+) -> UserPrincipal:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admins only")
     return current_user
@@ -60,29 +84,34 @@ async def get_current_admin(
 
 async def get_current_student(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-) -> Student:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        sub: str = payload.get("sub")
-        if sub is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+) -> StudentPrincipal:
+    cached = principal_cache.get(token)
+    if cached is not None:
+        sub = cached.sub
+    else:
+        sub, exp = decode_token(token)
 
     if not sub.startswith("student:"):
         raise HTTPException(status_code=403, detail="Students only")
+    if cached is not None:
+        return cached.principal
 
     student_id = sub.split(":", 1)[1]
 
-    result = await db.execute(select(Student).where(Student.student_id == student_id))
-    student = result.scalars().first()
-    if student is None:
+    # face_encoding is not loaded here; endpoints that compare faces fetch it
+    result = await db.execute(
+        select(
+            Student.id, Student.student_id, Student.full_name, Student.group_id
+        ).where(Student.student_id == student_id)
+    )
+    row = result.first()
+    if row is None:
         raise credentials_exception
+    student = StudentPrincipal(
+        id=row.id,
+        student_id=row.student_id,
+        full_name=row.full_name,
+        group_id=row.group_id,
+    )
+    principal_cache.set(token, sub, student, exp)
     return student
@@ -9,12 +9,15 @@ from sqlalchemy.future import select
 from app.core.database import get_db
 from app.core import security
 from app.core.config import settings
+from app.core.metrics import FACE_STAGE_SECONDS
 from app.models.user import User
 from app.models.student import Student
 from app.schemas.user import UserCreate, User as UserSchema
 from app.schemas.token import Token
 from app.api.deps import get_current_user, get_current_admin
 from app.services.face_service import FaceService
+from app.services.face_index import face_index
+from app.services.password_hasher import password_hasher
 
 router = APIRouter()
 
@@ -48,7 +51,7 @@ async def register(
 
     user = User(
         username=user_in.username,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await password_hasher.hash(user_in.password),
         role=role,
     )
     db.add(user)
@@ -63,14 +66,22 @@ async def login(
 ):
     result = await db.execute(select(User).where(User.username == form_data.username))
     user = result.scalars().first()
-    if not user or not security.verify_password(
-        form_data.password, user.hashed_password
-    ):
+    valid, new_hash = False, None
+    if user:
+        # In the bcrypt pool; 503 if too many logins are already in flight
+        valid, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Stored with another cost than BCRYPT_ROUNDS
+        user.hashed_password = new_hash
+        await db.commit()
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
@@ -84,55 +95,23 @@ async def login(
 async def student_identify(
     file: UploadFile = File(...), db: AsyncSession = Depends(get_db)
 ):
-    # Save temp file
-    import shutil
-    import os
-    import uuid
-
-    filename = f"{uuid.uuid4()}.jpg"
-    file_path = f"/tmp/{filename}"
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    try:
-        # Get encoding
-        encoding = FaceService.get_face_encoding(file_path)
-        if encoding is None:
-            raise HTTPException(status_code=400, detail="No face found in image")
-
-        # Find match in DB
-        result = await db.execute(select(Student))
-        students = result.scalars().all()
-
-        matched_student = None
-        for student in students:
-            if student.face_encoding:
-                import numpy as np
-
-                # Convert list back to numpy array if needed, but FaceService handles it?
-                # FaceService.compare_faces expects list of encodings
-                # But here we compare one by one or batch.
-
-                # Check DB storage format. It's ARRAY(Float). SQLAlchemy returns list.
-                match = FaceService.compare_faces(
-                    np.array(student.face_encoding), encoding
-                )
-                if match:
-                    matched_student = student
-                    break
-
-        if not matched_student:
-            raise HTTPException(status_code=401, detail="Student not recognized")
-
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        # Role for student is 'student'
-        access_token = security.create_access_token(
-            data={"sub": f"student:{matched_student.student_id}", "role": "student"},
-            expires_delta=access_token_expires,
-        )
-        return {"access_token": access_token, "token_type": "bearer"}
+    encoding = await FaceService.get_face_encoding(file)
+
+    # 1:N match against the in-memory gallery instead of scanning the table
+    with FACE_STAGE_SECONDS.time("identify"):
+        matched_id = face_index.identify(encoding)
+    if matched_id is None:
+        raise HTTPException(status_code=401, detail="Student not recognized")
 
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    result = await db.execute(select(Student).where(Student.id == matched_id))
+    matched_student = result.scalars().first()
+    if not matched_student:
+        raise HTTPException(status_code=401, detail="Student not recognized")
+
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Role for student is 'student'
+    access_token = security.create_access_token(
+        data={"sub": f"student:{matched_student.student_id}", "role": "student"},
+        expires_delta=access_token_expires,
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_admin
+from app.core.database import pool_stats
+from app.services.principal_cache import UserPrincipal
+
+router = APIRouter()
+
+
+@router.get("/pool", response_model=dict)
+async def read_pool_stats(
+    current_user: UserPrincipal = Depends(get_current_admin),
+):
+    """
+    Connection pool state of this worker process: connections checked out,
+    overflow in use, checkout count, timeouts and time spent waiting.
+    """
+    return pool_stats()
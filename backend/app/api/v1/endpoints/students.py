@@ -1,54 +1,29 @@
+import asyncio
+import json
+import shutil
+import tempfile
+import zipfile
 from datetime import timedelta
-from typing import Any, List
+from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
 from app.models.student import Student
-from app.models.user import User
 from app.api.deps import get_current_user, get_current_student
+from app.services.principal_cache import StudentPrincipal, UserPrincipal
 from app.services.face_service import FaceService
+from app.services.face_index import face_index
+from app.services.face_pool import face_pool
+from app.services.student_import import PhotoSource, parse_manifest, validate_rows
 from app.core.security import settings
 from app.core import security
 
-# Dependency to ensure admin is logged in (simplified check for presence of user in token)
-# Real implementation needs get_current_user dependency
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
-
-
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    # If it's a student token, deny access to admin features
-    # (Simple check: our admin tokens have username as sub, student tokens have student:ID)
-    if username.startswith("student:"):
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
-    if user is None:
-        raise credentials_exception
-    return user
 
 
 @router.post("/", response_model=None)
@@ -58,7 +33,7 @@ async def create_student(
     group_id: str = Form(...),
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ) -> Any:
     # Check if student_id exists
     result = await db.execute(select(Student).where(Student.student_id == student_id))
@@ -87,6 +62,9 @@ async def create_student(
     db.add(student)
     await db.commit()
     await db.refresh(student)
+
+    # Make the new student identifiable without rebuilding the gallery
+    await face_index.enroll(student.id, encoding)
     return {
         "id": student.id,
         "full_name": student.full_name,
@@ -94,12 +72,191 @@ async def create_student(
     }
 
 
+@router.post("/bulk")
+async def bulk_create_students(
+    manifest: UploadFile = File(...),
+    archive: Optional[UploadFile] = File(None),
+    photos: List[UploadFile] = File([]),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Enroll many students at once.
+
+    Takes a CSV/JSON manifest (full_name, student_id, group_id[, photo]) and
+    the photos either as a ZIP archive or as a multipart batch. Faces are
+    encoded in parallel on the face pool, duplicates are checked with one
+    query and all new students are inserted with one multi-row INSERT.
+    Progress is streamed back as NDJSON, one line per row plus a summary.
+    """
+    rows = parse_manifest(manifest.filename, await manifest.read())
+
+    # Keep our own copy of the archive: upload temp files may be closed
+    # before the streamed response finishes
+    spool = None
+    if archive is not None:
+        spool = tempfile.TemporaryFile()
+        await run_in_threadpool(shutil.copyfileobj, archive.file, spool)
+
+    # Multipart photos are spooled to temp files too and read one at a time
+    # while encoding, instead of holding the whole batch in memory
+    files = {}
+    for photo in photos:
+        if photo.filename:
+            files[photo.filename] = tempfile.TemporaryFile()
+            await run_in_threadpool(
+                shutil.copyfileobj, photo.file, files[photo.filename]
+            )
+    try:
+        photo_source = PhotoSource(spool, files)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Archive is not a valid ZIP")
+
+    return StreamingResponse(
+        _bulk_enroll(rows, photo_source), media_type="application/x-ndjson"
+    )
+
+
+async def _bulk_enroll(rows: List[dict], photos: PhotoSource):
+    def line(**data) -> str:
+        return json.dumps(data) + "\n"
+
+    failed = 0
+    tasks = []
+    try:
+        valid, errors = validate_rows(rows, photos)
+        for number, sid, detail in errors:
+            failed += 1
+            yield line(row=number, student_id=sid, status="error", detail=detail)
+
+        # One set-based duplicate check instead of a query per student, in a
+        # session of its own: no connection is held while photos are encoded
+        if valid:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(Student.student_id).where(
+                        Student.student_id.in_(
+                            [row["student_id"] for _, row, _ in valid]
+                        )
+                    )
+                )
+                existing = set(result.scalars().all())
+            for number, row, _ in valid:
+                if row["student_id"] in existing:
+                    failed += 1
+                    yield line(
+                        row=number,
+                        student_id=row["student_id"],
+                        status="error",
+                        detail="Student ID already exists",
+                    )
+            valid = [v for v in valid if v[1]["student_id"] not in existing]
+
+        # Encode on every face worker at once; the limit keeps at most
+        # that many photos in memory and leaves queue room for logins
+        limit = asyncio.Semaphore(face_pool.workers)
+
+        async def encode(number, row, photo_key):
+            async with limit:
+                try:
+                    # ZIP members are decompressed off the event loop
+                    data = await run_in_threadpool(photos.read, photo_key)
+                    encoding = await FaceService.encode_bytes(data, wait=True)
+                    return number, row, encoding, None
+                except HTTPException as e:
+                    return number, row, None, e.detail
+                except Exception as e:
+                    return number, row, None, str(e)
+
+        encoded = []
+        tasks = [asyncio.ensure_future(encode(*v)) for v in valid]
+        for task in asyncio.as_completed(tasks):
+            number, row, encoding, error = await task
+            if error:
+                failed += 1
+                yield line(
+                    row=number,
+                    student_id=row["student_id"],
+                    status="error",
+                    detail=error,
+                )
+            else:
+                encoded.append((number, row, encoding))
+                yield line(row=number, student_id=row["student_id"], status="encoded")
+
+        created = 0
+        if encoded:
+            values = [
+                {
+                    "full_name": row["full_name"],
+                    "student_id": row["student_id"],
+                    "group_id": row["group_id"],
+                    "face_encoding": encoding,
+                    "photo_path": "stored_as_embedding",
+                }
+                for _, row, encoding in encoded
+            ]
+            try:
+                async with AsyncSessionLocal() as db:
+                    # executemany with RETURNING is sent as multi-row
+                    # INSERT ... VALUES batches by SQLAlchemy. Students
+                    # enrolled concurrently since the duplicate check are
+                    # skipped instead of failing the whole batch.
+                    result = await db.execute(
+                        insert(Student)
+                        .on_conflict_do_nothing(index_elements=["student_id"])
+                        .returning(Student.id, Student.student_id),
+                        values,
+                    )
+                    inserted = {sid: db_id for db_id, sid in result.all()}
+                    await db.commit()
+            except Exception as e:
+                failed += len(encoded)
+                yield line(status="error", detail=f"Insert failed: {e}")
+                encoded, inserted = [], {}
+
+            for number, row, _ in encoded:
+                if row["student_id"] not in inserted:
+                    failed += 1
+                    yield line(
+                        row=number,
+                        student_id=row["student_id"],
+                        status="error",
+                        detail="Student ID already exists",
+                    )
+            encoded = [e for e in encoded if e[1]["student_id"] in inserted]
+
+            # One index update for the batch (a file rewrite when shared)
+            if encoded:
+                await face_index.enroll_many(
+                    (inserted[row["student_id"]], encoding)
+                    for _, row, encoding in encoded
+                )
+            for number, row, encoding in encoded:
+                db_id = inserted[row["student_id"]]
+                created += 1
+                yield line(
+                    row=number,
+                    student_id=row["student_id"],
+                    status="created",
+                    id=db_id,
+                )
+
+        yield line(status="done", created=created, failed=failed)
+    finally:
+        # Client disconnected mid-stream: stop encoding photos nobody waits for
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        photos.close()
+
+
 @router.get("/", response_model=List[dict])
 async def read_students(
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ) -> Any:
     result = await db.execute(select(Student).offset(skip).limit(limit))
     students = result.scalars().all()
@@ -127,7 +284,7 @@ async def verify_student(
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    if not student.face_encoding:
+    if student.face_encoding is None:
         raise HTTPException(
             status_code=400, detail="Student has no registered face data"
         )
@@ -145,7 +302,7 @@ async def verify_student(
         raise HTTPException(status_code=500, detail=f"Error processing face: {str(e)}")
 
     # 3. Compare Faces
-    # student.face_encoding is stored as a list (from JSON/ARRAY). verify_face expects list.
+    # student.face_encoding is loaded as a float32 NumPy array
     is_match = FaceService.verify_face(student.face_encoding, check_encoding)
 
     if not is_match:
@@ -178,13 +335,18 @@ async def verify_student(
 @router.post("/verify-match", response_model=dict)
 async def verify_student_match(
     file: UploadFile = File(...),
-    current_student: Student = Depends(get_current_student),
+    db: AsyncSession = Depends(get_db),
+    current_student: StudentPrincipal = Depends(get_current_student),
 ) -> Any:
     """
     Verifies that the uploaded face matches the currently logged-in student.
     Used for pre-test verification.
     """
-    if not current_student.face_encoding:
+    result = await db.execute(
+        select(Student.face_encoding).where(Student.id == current_student.id)
+    )
+    known_encoding = result.scalar()
+    if known_encoding is None:
         raise HTTPException(
             status_code=400, detail="Student has no registered face data"
         )
@@ -196,7 +358,7 @@ async def verify_student_match(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing face: {str(e)}")
 
-    is_match = FaceService.verify_face(current_student.face_encoding, check_encoding)
+    is_match = FaceService.verify_face(known_encoding, check_encoding)
 
     if not is_match:
         raise HTTPException(
@@ -4,9 +4,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.core.database import get_db
 from app.api.deps import get_current_admin
-from app.models.user import User
+from app.services.principal_cache import UserPrincipal
 from app.models.subject import Subject
 from app.schemas.subject import SubjectCreate, Subject as SubjectSchema, SubjectUpdate
+from app.services.test_cache import invalidate_all_tests
 
 router = APIRouter()
 
@@ -16,7 +17,7 @@ async def read_subjects(
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_db),
-    # current_user: User = Depends(get_current_admin) # Allow students to see subjects too?
+    # current_user: UserPrincipal = Depends(get_current_admin) # Allow students to see subjects too?
 ):
     result = await db.execute(select(Subject).offset(skip).limit(limit))
     return result.scalars().all()
@@ -26,7 +27,7 @@ async def read_subjects(
 async def create_subject(
     subject_in: SubjectCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin),
+    current_user: UserPrincipal = Depends(get_current_admin),
 ):
     result = await db.execute(select(Subject).where(Subject.name == subject_in.name))
     if result.scalars().first():
@@ -43,7 +44,7 @@ async def create_subject(
 async def delete_subject(
     subject_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin),
+    current_user: UserPrincipal = Depends(get_current_admin),
 ):
     result = await db.execute(select(Subject).where(Subject.id == subject_id))
     subject = result.scalars().first()
@@ -52,4 +53,6 @@ async def delete_subject(
 
     await db.delete(subject)
     await db.commit()
+    # Cached test payloads embed the subject
+    invalidate_all_tests()
     return subject
@@ -4,9 +4,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
-from app.core import security
 from app.core.database import get_db
 from app.api.deps import get_current_admin
+from app.services.password_hasher import password_hasher
+from app.services.principal_cache import UserPrincipal, invalidate_user
 from app.models.user import User
 from app.models.teacher import Teacher
 from app.schemas.teacher import TeacherCreate, TeacherUpdate, Teacher as TeacherSchema
@@ -17,7 +18,7 @@ router = APIRouter()
 @router.get("/", response_model=List[TeacherSchema])
 async def read_teachers(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin),
+    current_user: UserPrincipal = Depends(get_current_admin),
 ):
     """
     Retrieve all teachers with user info.
@@ -31,7 +32,7 @@ async def read_teachers(
 async def create_teacher(
     teacher_in: TeacherCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin),
+    current_user: UserPrincipal = Depends(get_current_admin),
 ):
     """
     Create a new teacher (and underlying User).
@@ -52,7 +53,7 @@ async def create_teacher(
     # 1. Create User
     user = User(
         username=teacher_in.passport_serial,
-        hashed_password=security.get_password_hash(teacher_in.jshshir),
+        hashed_password=await password_hasher.hash(teacher_in.jshshir),
         role="teacher",
     )
     db.add(user)
@@ -84,7 +85,7 @@ async def update_teacher(
     teacher_id: int,
     teacher_in: TeacherUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin),
+    current_user: UserPrincipal = Depends(get_current_admin),
 ):
     """
     Update a teacher's information.
@@ -97,6 +98,7 @@ async def update_teacher(
     teacher = result.scalars().first()
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
+    old_username = teacher.user.username
 
     # Update Profile
     # Update Profile
@@ -108,7 +110,6 @@ async def update_teacher(
         teacher.jshshir = teacher_in.jshshir
         # Update password if jshshir changes (and no manual password override provided?)
         # Logic: JSHSHIR is the password.
-        teacher.user.hashed_password = security.get_password_hash(teacher_in.jshshir)
 
     if teacher_in.passport_serial:
         teacher.passport_serial = teacher_in.passport_serial
@@ -116,12 +117,15 @@ async def update_teacher(
         teacher.user.username = teacher_in.passport_serial
 
     # Allow manual password override if strictly needed, but JSHSHIR usually governs it
-    if teacher_in.password:
-        teacher.user.hashed_password = security.get_password_hash(teacher_in.password)
+    new_password = teacher_in.password or teacher_in.jshshir
+    if new_password:
+        # Hashed once, in the bcrypt pool
+        teacher.user.hashed_password = await password_hasher.hash(new_password)
 
     db.add(teacher)
     db.add(teacher.user)  # Ensure user update is tracked
     await db.commit()
+    invalidate_user(old_username)
     await db.refresh(teacher)
     return teacher
 
@@ -130,7 +134,7 @@ async def update_teacher(
 async def delete_teacher(
     teacher_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin),
+    current_user: UserPrincipal = Depends(get_current_admin),
 ):
     """
     Delete a teacher.
@@ -154,4 +158,6 @@ async def delete_teacher(
         await db.delete(user_to_delete)
 
     await db.commit()
+    if user_to_delete:
+        invalidate_user(user_to_delete.username)
     return teacher
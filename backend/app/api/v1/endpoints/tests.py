@@ -1,77 +1,218 @@
+import base64
+import csv
+import io
+import json
+from datetime import datetime
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import (
+    Integer,
+    any_,
+    bindparam,
+    delete,
+    func,
+    insert,
+    literal_column,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-
-from app.core.database import get_db
-from app.models.test import Test, Question, Result
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import get_db, get_read_db, ReadSessionLocal
+from app.core.responses import json_response
+from app.models.test import (
+    Test,
+    Question,
+    Result,
+    QuestionOptionStat,
+    ScoreBucketStat,
+)
 from app.models.student import Student
 from app.api.deps import get_current_user, get_current_student
+from app.services.principal_cache import StudentPrincipal, UserPrincipal
 from app.schemas import test as test_schema
-from app.models.user import User
+from app.models.subject import Subject
+from app.services import test_import
+from app.services.answer_keys import answer_keys, score_answers
+from app.services.result_writer import result_writer
+from app.services.analytics import (
+    SCORE_BUCKETS,
+    insert_results,
+    new_result_row,
+)
+from app.services.test_cache import test_cache, invalidate_test, payload_response
+from app.services.upload_store import upload_store
 
 router = APIRouter()
 
+tests_adapter = TypeAdapter(List[test_schema.Test])
+
+
+def _question_values(q: test_schema.QuestionBase) -> dict:
+    """Validate a question and return its column values."""
+    if q.correct_option >= len(q.options):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Correct option index {q.correct_option} is out of bounds for question '{q.text}'",
+        )
+    return {
+        "text": q.text,
+        "image": q.image,
+        "options": q.options,
+        "correct_option": q.correct_option,
+    }
+
+
+async def _insert_tests(
+    db: AsyncSession, tests_in: List[test_schema.TestCreate]
+) -> List[dict]:
+    """
+    Insert tests and all their questions with one executemany INSERT each.
+
+    Returns response dicts (test_schema.Test shape) built from the inserted
+    values, so no refresh or reload query is needed. Does not commit.
+    """
+    question_values = [[_question_values(q) for q in t.questions] for t in tests_in]
+
+    result = await db.execute(
+        insert(Test).returning(Test.id, sort_by_parameter_order=True),
+        [
+            {"title": t.title, "description": t.description, "subject_id": t.subject_id}
+            for t in tests_in
+        ],
+    )
+    test_ids = result.scalars().all()
+
+    rows = [
+        {"test_id": test_id, "position": position, **values}
+        for test_id, questions in zip(test_ids, question_values)
+        for position, values in enumerate(questions)
+    ]
+    question_ids = []
+    if rows:
+        result = await db.execute(
+            insert(Question).returning(Question.id, sort_by_parameter_order=True),
+            rows,
+        )
+        question_ids = result.scalars().all()
+
+    subject_ids = {t.subject_id for t in tests_in if t.subject_id is not None}
+    subjects = {}
+    if subject_ids:
+        result = await db.execute(select(Subject).where(Subject.id.in_(subject_ids)))
+        subjects = {s.id: {"id": s.id, "name": s.name} for s in result.scalars()}
+
+    created, ids = [], iter(question_ids)
+    for test_id, test_in, questions in zip(test_ids, tests_in, question_values):
+        created.append(
+            {
+                "id": test_id,
+                "title": test_in.title,
+                "description": test_in.description,
+                "subject_id": test_in.subject_id,
+                "version": 1,
+                "subject": subjects.get(test_in.subject_id),
+                "questions": [
+                    {"id": next(ids), "test_id": test_id, **values}
+                    for values in questions
+                ],
+            }
+        )
+    return created
+
 
 @router.post("/", response_model=test_schema.Test)
 async def create_test(
     test_in: test_schema.TestCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     try:
-        test = Test(
-            title=test_in.title,
-            description=test_in.description,
-            subject_id=test_in.subject_id,
-        )
-        db.add(test)
-        await db.flush()  # Get ID
+        created = await _insert_tests(db, [test_in])
+        await db.commit()
+        invalidate_test(created[0]["id"])
+        return created[0]
 
-        for q in test_in.questions:
-            if q.correct_option >= len(q.options):
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Correct option index {q.correct_option} is out of bounds for question '{q.text}'",
-                )
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        import logging
 
-            question = Question(
-                test_id=test.id,
-                text=q.text,
-                options=q.options,
-                correct_option=q.correct_option,
-            )
-            db.add(question)
+        logging.error(f"Error creating test: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        await db.commit()
-        await db.refresh(test)
 
-        # Eager load questions for response
-        result = await db.execute(
-            select(Test)
-            .options(selectinload(Test.questions), selectinload(Test.subject))
-            .where(Test.id == test.id)
-        )
-        test_loaded = result.scalars().first()
-        return test_loaded
+@router.post("/import", response_model=dict)
+async def import_tests(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Import many tests in one transaction.
+
+    Accepts a JSON file (list of tests in the create format), a CSV file
+    (one question per row) or a ZIP archive holding tests.json/tests.csv and
+    the images they reference.
+    """
+    data = await file.read()
+    images = []
+    if (file.filename or "").lower().endswith(".zip"):
+        tests_in, images = await run_in_threadpool(test_import.parse_archive, data)
+    else:
+        tests_in = test_import.parse_tests(file.filename, data)
 
+    try:
+        if not tests_in:
+            raise HTTPException(status_code=400, detail="No tests found in file")
+        created = await _insert_tests(db, tests_in)
+        await db.commit()
     except HTTPException:
+        await db.rollback()
+        # Images stored from the archive for the tests that were not saved
+        await run_in_threadpool(upload_store.discard, images)
         raise
     except Exception as e:
         await db.rollback()
+        await run_in_threadpool(upload_store.discard, images)
         import logging
 
-        logging.error(f"Error creating test: {e}")
+        logging.error(f"Error importing tests: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    invalidate_test()
+    return {
+        "imported": len(created),
+        "tests": [
+            {"id": t["id"], "title": t["title"], "question_count": len(t["questions"])}
+            for t in created
+        ],
+    }
+
 
-@router.put("/{test_id}", response_model=test_schema.Test)
+@router.put("/{test_id}", response_model=test_schema.TestUpdateResult)
 async def update_test(
     test_id: int,
     test_in: test_schema.TestUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     try:
         result = await db.execute(select(Test).where(Test.id == test_id))
@@ -83,46 +224,83 @@ async def update_test(
         test.title = test_in.title
         test.description = test_in.description
         test.subject_id = test_in.subject_id
+        # Incremented in SQL: concurrent edits must not both write the
+        # same next version and leave a stale answer key current
+        test.version = Test.version + 1
+
+        # Diff questions against what is stored so unchanged questions keep
+        # their IDs and cost nothing: one statement per kind of change
+        q_result = await db.execute(
+            select(
+                Question.id,
+                Question.text,
+                Question.image,
+                Question.options,
+                Question.correct_option,
+                Question.position,
+            ).where(Question.test_id == test_id)
+        )
+        existing = {row.id: row for row in q_result.all()}
 
-        # Replace questions - delete existing and add new
-        # Note: This changes question IDs. For a simple app this is acceptable.
-        # Ideally, we would diff and update.
-
-        # Delete existing questions
-        q_result = await db.execute(select(Question).where(Question.test_id == test_id))
-        existing_questions = q_result.scalars().all()
-        for q in existing_questions:
-            await db.delete(q)
-
-        await db.flush()
+        to_update, to_insert, kept_ids = [], [], set()
+        # Questions keep the order they have in the editor
+        for position, q in enumerate(test_in.questions):
+            values = {**_question_values(q), "position": position}
+            if q.id is None:
+                to_insert.append({"test_id": test_id, **values})
+                continue
 
-        # Add new questions
-        for q in test_in.questions:
-            if q.correct_option >= len(q.options):
+            if q.id not in existing or q.id in kept_ids:
                 raise HTTPException(
                     status_code=400,
-                    detail=f"Correct option index {q.correct_option} is out of bounds for question '{q.text}'",
+                    detail=f"Question {q.id} does not belong to this test",
+                )
+            kept_ids.add(q.id)
+
+            old = existing[q.id]
+            if (
+                old.text,
+                old.image,
+                old.options,
+                old.correct_option,
+                old.position,
+            ) != tuple(values.values()):
+                to_update.append({"id": q.id, **values})
+
+        to_delete = [qid for qid in existing if qid not in kept_ids]
+
+        if to_update:
+            # Bulk UPDATE by primary key (executemany)
+            await db.execute(update(Question), to_update)
+        if to_insert:
+            await db.execute(insert(Question), to_insert)
+        if to_delete:
+            await db.execute(
+                delete(Question).where(
+                    Question.id == any_(bindparam("ids", to_delete, type_=ARRAY(Integer)))
                 )
-
-            question = Question(
-                test_id=test.id,
-                text=q.text,
-                options=q.options,
-                correct_option=q.correct_option,
             )
-            db.add(question)
 
         await db.commit()
-        await db.refresh(test)
+        invalidate_test(test_id)
+        answer_keys.invalidate(test_id)
 
         # Eager load questions for response
         result = await db.execute(
             select(Test)
             .options(selectinload(Test.questions), selectinload(Test.subject))
-            .where(Test.id == test.id)
+            .where(Test.id == test_id)
+            .execution_options(populate_existing=True)
         )
         test_loaded = result.scalars().first()
-        return test_loaded
+        return {
+            **test_schema.Test.model_validate(test_loaded).model_dump(),
+            "changes": {
+                "inserted": len(to_insert),
+                "updated": len(to_update),
+                "deleted": len(to_delete),
+            },
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -137,7 +315,7 @@ async def update_test(
 async def delete_test(
     test_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     try:
         result = await db.execute(select(Test).where(Test.id == test_id))
@@ -151,6 +329,10 @@ async def delete_test(
         # Actually in SQLAlchemy asyncio, we delete the object.
         await db.delete(test)
         await db.commit()
+        invalidate_test(test_id)
+        answer_keys.invalidate(test_id)
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         import logging
@@ -161,109 +343,405 @@ async def delete_test(
 
 @router.get("/", response_model=List[test_schema.Test])
 async def read_tests(
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(Test)
-        .options(selectinload(Test.questions), selectinload(Test.subject))
+    # Serve the pre-serialized listing; only rebuild it after a change.
+    # Rebuilt from the primary: a lagging replica would put the pre-edit
+    # listing back in the cache right after the edit invalidated it.
+    payload = test_cache.get(("list",))
+    if payload is None:
+        generation = test_cache.generation
+        result = await db.execute(
+            select(Test)
+            .options(selectinload(Test.questions), selectinload(Test.subject))
+            .order_by(Test.id.desc())
+        )
+        tests = result.scalars().all()
+        body = tests_adapter.dump_json(
+            tests_adapter.validate_python(tests, from_attributes=True)
+        )
+        payload = test_cache.set(("list",), body, generation)
+    return payload_response(request, payload)
+
+
+def _summary_query(cursor: Optional[int], limit: int, subject_id: Optional[int]):
+    question_count = (
+        select(func.count(Question.id))
+        .where(Question.test_id == Test.id)
+        .correlate(Test)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            Test.id,
+            Test.title,
+            Test.description,
+            Test.subject_id,
+            Test.created_at,
+            Subject.name.label("subject_name"),
+            question_count.label("question_count"),
+        )
+        .outerjoin(Subject, Subject.id == Test.subject_id)
         .order_by(Test.id.desc())
+        .limit(limit)
     )
-    tests = result.scalars().all()
-    return tests
+    if cursor is not None:
+        query = query.where(Test.id < cursor)
+    if subject_id is not None:
+        query = query.where(Test.subject_id == subject_id)
+    return query
+
+
+@router.get("/summary", response_model=test_schema.TestSummaryPage)
+async def read_test_summaries(
+    cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    subject_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Lightweight test listing: metadata, subject name and question count only.
+
+    Newest first, keyset-paginated on Test.id so deep pages cost the same
+    as the first one.
+    """
+    query = _summary_query(cursor, limit + 1, subject_id)
+    result = await db.execute(query)
+    rows = result.mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["id"]
+    return {"items": rows, "next_cursor": next_cursor}
 
 
 @router.get("/{test_id}", response_model=test_schema.Test)
-async def get_test(test_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Test)
-        .options(selectinload(Test.questions), selectinload(Test.subject))
-        .where(Test.id == test_id)
-    )
-    test = result.scalars().first()
-    if not test:
+async def get_test(test_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    # Cached per version: an edit made through another worker never reaches
+    # this worker's cache, but it bumps the version (one primary key probe)
+    result = await db.execute(select(Test.version).where(Test.id == test_id))
+    version = result.scalar_one_or_none()
+    if version is None:
         raise HTTPException(status_code=404, detail="Test not found")
-    return test
+
+    payload = test_cache.get(("test", test_id, version))
+    if payload is None:
+        generation = test_cache.generation
+        result = await db.execute(
+            select(Test)
+            .options(selectinload(Test.questions), selectinload(Test.subject))
+            .where(Test.id == test_id)
+        )
+        test = result.scalars().first()
+        if not test:
+            raise HTTPException(status_code=404, detail="Test not found")
+        body = test_schema.Test.model_validate(test).model_dump_json().encode()
+        # Keyed on the version that was actually loaded
+        payload = test_cache.set(("test", test_id, test.version), body, generation)
+    return payload_response(request, payload)
 
 
 @router.post("/submit", response_model=dict)
 async def submit_test(
     submission: test_schema.ResultSubmit,
     db: AsyncSession = Depends(get_db),
-    student: Student = Depends(get_current_student),
+    student: StudentPrincipal = Depends(get_current_student),
 ):
+    # Answers are positional, in question order; the cached key is only
+    # rebuilt when the test version changes
+    key = await answer_keys.get(db, submission.test_id)
+    if key is None:
+        raise HTTPException(status_code=404, detail="Test not found")
+    if submission.version is not None and submission.version != key.version:
+        # Positions and correct options may have changed: scoring these
+        # answers against the current key would be wrong
+        raise HTTPException(
+            status_code=409,
+            detail="The test was changed while it was being taken, reload it",
+        )
+
+    score = score_answers(key, submission.answers)
+    row = new_result_row(student.id, submission.test_id, key, submission.answers, score)
+
+    if result_writer.running:
+        # Spooled locally and inserted in a batch by the background writer
+        result_writer.submit(row)
+    else:
+        await insert_results(db, [row])
+        await db.commit()
+
+    return {"message": "Test submitted successfully", "score": score}
+
+
+@router.get("/{test_id}/analytics", response_model=test_schema.TestAnalytics)
+async def get_test_analytics(
+    test_id: int,
+    version: Optional[int] = Query(None, description="Test version, default current"),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Item statistics for a test, read from the rollup tables only.
+
+    Per question: how often each option was chosen, how many students
+    answered and the share that answered correctly (difficulty index).
+    Option statistics are per test version because answers are positional.
+    New submissions show up after the next rollup pass, within about
+    ANALYTICS_ROLLUP_INTERVAL seconds.
+    """
+    key = await answer_keys.get(db, test_id)
+    if key is None:
+        raise HTTPException(status_code=404, detail="Test not found")
+    if version is None:
+        version = key.version
+
     result = await db.execute(
-        select(Test)
-        .options(selectinload(Test.questions))
-        .where(Test.id == submission.test_id)
+        select(ScoreBucketStat.bucket, ScoreBucketStat.count).where(
+            ScoreBucketStat.test_id == test_id
+        )
     )
-    test = result.scalars().first()
-    if not test:
-        raise HTTPException(status_code=404, detail="Test not found")
+    histogram = [0] * SCORE_BUCKETS
+    for bucket, count in result.all():
+        histogram[bucket] = count
 
-    correct_count = 0
-    total_questions = len(test.questions)
+    result = await db.execute(
+        select(
+            QuestionOptionStat.position,
+            QuestionOptionStat.option,
+            QuestionOptionStat.count,
+        ).where(
+            QuestionOptionStat.test_id == test_id,
+            QuestionOptionStat.test_version == version,
+        )
+    )
+    options_by_position = {}
+    for position, option, count in result.all():
+        options_by_position.setdefault(position, {})[option] = count
 
-    # Sort questions by ID to ensure order matches submission if that's the contract
-    # Ideally, submission should include question_id map
-    questions_sorted = sorted(test.questions, key=lambda q: q.id)
+    # Correct options are only known for the current version
+    correct = key.correct.tolist() if version == key.version else []
+    result = await db.execute(
+        select(Question.id)
+        .where(Question.test_id == test_id)
+        .order_by(Question.position)
+    )
+    question_ids = result.scalars().all() if correct else []
+
+    questions = []
+    for position in sorted(set(options_by_position) | set(range(len(correct)))):
+        counts = options_by_position.get(position, {})
+        answered = sum(c for option, c in counts.items() if option >= 0)
+        stats = {
+            "position": position,
+            "option_counts": counts,
+            "answered": answered,
+            "unanswered": counts.get(-1, 0),
+        }
+        if position < len(correct):
+            right = counts.get(correct[position], 0)
+            stats.update(
+                question_id=question_ids[position],
+                correct_option=correct[position],
+                correct=right,
+                difficulty=right / answered if answered else None,
+            )
+        questions.append(stats)
 
-    if len(submission.answers) != total_questions:
-        # Handle mismatch
-        pass
+    step = 100 // SCORE_BUCKETS
+    return {
+        "test_id": test_id,
+        "version": version,
+        "submissions": sum(histogram),
+        "score_histogram": [
+            {"min_score": i * step, "max_score": (i + 1) * step, "count": count}
+            for i, count in enumerate(histogram)
+        ],
+        "questions": questions,
+    }
 
-    for i, answer_idx in enumerate(submission.answers):
-        if i < len(questions_sorted):
-            if questions_sorted[i].correct_option == answer_idx:
-                correct_count += 1
 
-    score = (correct_count / total_questions) * 100 if total_questions > 0 else 0
+# Sort key of the results listing. taken_at is nullable and a NULL never
+# satisfies the keyset comparison, so NULLs sort (and compare) as -infinity,
+# i.e. last. Spelled exactly like the ix_results_sort_time_id expression.
+NULL_TAKEN_AT = literal_column("'-infinity'::timestamptz")
+RESULT_SORT_TIME = func.coalesce(Result.taken_at, NULL_TAKEN_AT)
 
-    result_obj = Result(student_id=student.id, test_id=test.id, score=score)
-    db.add(result_obj)
-    await db.commit()
 
-    return {"message": "Test submitted successfully", "score": score}
+def _encode_cursor(taken_at: Optional[datetime], result_id: int) -> str:
+    raw = f"{taken_at.isoformat() if taken_at else '-infinity'}|{result_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        taken_at, result_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        if taken_at == "-infinity":
+            return NULL_TAKEN_AT, int(result_id)
+        return datetime.fromisoformat(taken_at), int(result_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after_cursor(query, cursor: str):
+    """Continue the listing after the row the cursor was taken from."""
+    taken_at, result_id = _decode_cursor(cursor)
+    return query.where(
+        tuple_(RESULT_SORT_TIME, Result.id) < tuple_(taken_at, result_id)
+    )
+
+
+def _results_query(
+    test_id: Optional[int],
+    group_id: Optional[str],
+    subject_id: Optional[int],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+):
+    """Projection of the listing columns only, newest first on (taken_at, id)."""
+    query = (
+        select(
+            Result.id,
+            Student.full_name.label("student_name"),
+            Student.group_id,
+            Test.title.label("test_title"),
+            Result.score,
+            Result.taken_at,
+        )
+        .outerjoin(Student, Student.id == Result.student_id)
+        .outerjoin(Test, Test.id == Result.test_id)
+        .order_by(RESULT_SORT_TIME.desc(), Result.id.desc())
+    )
+    if test_id is not None:
+        query = query.where(Result.test_id == test_id)
+    if group_id is not None:
+        query = query.where(Student.group_id == group_id)
+    if subject_id is not None:
+        query = query.where(Test.subject_id == subject_id)
+    if date_from is not None:
+        query = query.where(Result.taken_at >= date_from)
+    if date_to is not None:
+        query = query.where(Result.taken_at < date_to)
+    return query
+
+
+def _result_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "student_name": row.student_name or "Unknown",
+        "group_id": row.group_id,
+        "test_title": row.test_title or "Unknown",
+        "score": row.score,
+        "taken_at": row.taken_at,
+    }
 
 
 @router.get("/results/all", response_model=List[dict])
 async def get_all_results(
-    db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
+    test_id: Optional[int] = None,
+    group_id: Optional[str] = None,
+    subject_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(Result).options(selectinload(Result.student), selectinload(Result.test))
-    )
-    results = result.scalars().all()
-
-    return [
-        {
-            "id": r.id,
-            "student_name": r.student.full_name if r.student else "Unknown",
-            "test_title": r.test.title if r.test else "Unknown",
-            "score": r.score,
-            "taken_at": r.taken_at,
-        }
-        for r in results
-    ]
+    """
+    One page of results. The cursor for the next page is returned in the
+    X-Next-Cursor header; it is absent on the last page.
+    """
+    query = _results_query(test_id, group_id, subject_id, date_from, date_to)
+    if cursor is not None:
+        query = _after_cursor(query, cursor)
+
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1].taken_at, rows[-1].id)
+    # Rows are already plain dicts; no response_model validation round trip
+    return json_response([_result_dict(r) for r in rows], headers=headers)
+
+
+@router.get("/results/export")
+async def export_results(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    test_id: Optional[int] = None,
+    group_id: Optional[str] = None,
+    subject_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    """
+    Stream every matching result as NDJSON or CSV.
+
+    Rows come from a server-side cursor and are written out as they arrive,
+    so memory use does not depend on the number of results.
+    """
+    query = _results_query(test_id, group_id, subject_id, date_from, date_to)
+    columns = ["id", "student_name", "group_id", "test_title", "score", "taken_at"]
+
+    async def rows():
+        # Own session: the request-scoped one may be closed while streaming
+        async with ReadSessionLocal() as db:
+            stream = await db.stream(query.execution_options(yield_per=1000))
+            async for row in stream:
+                yield _result_dict(row)
+
+    async def ndjson():
+        async for row in rows():
+            yield json.dumps(row, default=str) + "\n"
+
+    async def csv_lines():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        writer.writeheader()
+        async for row in rows():
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if format == "csv":
+        return StreamingResponse(
+            csv_lines(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="results.csv"'},
+        )
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 
 @router.get("/results/my", response_model=List[dict])
 async def get_my_results(
     db: AsyncSession = Depends(get_db),
-    current_student: Student = Depends(get_current_student),
+    current_student: StudentPrincipal = Depends(get_current_student),
 ):
     result = await db.execute(
-        select(Result)
-        .options(selectinload(Result.test))
+        select(
+            Result.id,
+            Test.title.label("test_title"),
+            Result.score,
+            Result.taken_at,
+        )
+        .outerjoin(Test, Test.id == Result.test_id)
         .where(Result.student_id == current_student.id)
+        .order_by(Result.taken_at.desc())
+    )
+
+    return json_response(
+        [
+            {
+                "id": r.id,
+                "test_title": r.test_title or "Unknown",
+                "score": r.score,
+                "taken_at": r.taken_at,
+            }
+            for r in result.all()
+        ]
     )
-    results = result.scalars().all()
-
-    return [
-        {
-            "id": r.id,
-            "test_title": r.test.title if r.test else "Unknown",
-            "score": r.score,
-            "taken_at": r.taken_at,
-        }
-        for r in results
-    ]
@@ -1,30 +1,33 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import shutil
-import os
-import uuid
+from fastapi import APIRouter, BackgroundTasks, Request
 
-router = APIRouter()
-
-UPLOAD_DIR = "uploads"
-
-# Ensure directory exists
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
+from app.services.image_variants import image_variants
+from app.services.upload_store import upload_store
 
+router = APIRouter()
 
-@router.post("/")
-async def upload_file(file: UploadFile = File(...)):
-    try:
-        # Create unique filename
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
+# The body is streamed by the handler itself, so describe the form for the docs
+UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
 
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
 
-        # Return the URL path
-        # Assuming we mount /static or /uploads to the uploads folder
-        return {"url": f"/uploads/{unique_filename}"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.post("/", openapi_extra=UPLOAD_FORM)
+async def upload_file(request: Request, background_tasks: BackgroundTasks):
+    # Streamed to disk and hashed chunk by chunk; identical images map to the
+    # same /uploads/<sha256>.<ext> URL
+    stored = await upload_store.save_multipart(request)
+    if stored.created and image_variants.is_source(stored.url):
+        # Resized variants are ready before the first exam asks for them
+        background_tasks.add_task(image_variants.generate, stored.sha256)
+    return {"url": stored.url}
@@ -0,0 +1,198 @@
+import zlib
+from functools import partial
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+# Chunks at least this big are compressed in a worker thread
+THREAD_MINIMUM_SIZE = 128 * 1024
+# Streamed chunks (e.g. one NDJSON/CSV row each) are collected up to this
+# size before they are compressed and flushed; every flush costs a few
+# bytes and resets the compressor's lookahead
+STREAM_FLUSH_SIZE = 16 * 1024
+# Already compressed, or streamed where buffering would hurt
+UNCOMPRESSIBLE_TYPES = {
+    "application/grpc",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "font/woff",
+    "font/woff2",
+    "image/avif",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "text/event-stream",
+}
+UNCOMPRESSIBLE_PREFIXES = ("audio/", "video/")
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        if name.strip().lower() != coding:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _compressible(media_type: str) -> bool:
+    return media_type not in UNCOMPRESSIBLE_TYPES and not media_type.startswith(
+        UNCOMPRESSIBLE_PREFIXES
+    )
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        data = self._compressor.process(data)
+        return data + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _CompressionResponder:
+    """Sends one response, compressed with ``make_compressor()`` if worthwhile."""
+
+    def __init__(self, app, minimum_size: int, make_compressor):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.make_compressor = make_compressor
+        self.send = None
+        # http.response.start, held back until the first body chunk shows
+        # whether the response gets compressed
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+        # Streamed body not compressed yet
+        self.pending = bytearray()
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self.compressor.compress, body, final)
+        return self.compressor.compress(body, final)
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").partition(";")[0]
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] == 206
+                or not _compressible(media_type.strip().lower())
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            # e.g. pathsend: sent as is
+            if self.start is not None:
+                start, self.start = self.start, None
+                await self.send(start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if len(body) < self.minimum_size and not more_body:
+                start, self.start = self.start, None
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self.compressor = self.make_compressor()
+
+        self.pending += body
+        if more_body and len(self.pending) < STREAM_FLUSH_SIZE:
+            return
+        body = await self._compress(bytes(self.pending), final=not more_body)
+        self.pending.clear()
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            headers["content-encoding"] = self.compressor.encoding
+            # The identity body's strong ETag does not describe these bytes;
+            # If-None-Match uses weak comparison, so 304s keep working
+            etag = headers.get("etag")
+            if etag is not None and not etag.startswith("W/"):
+                headers["etag"] = "W/" + etag
+            if more_body:
+                del headers["content-length"]
+            else:
+                headers["content-length"] = str(len(body))
+            await self.send(start)
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
+
+
+class CompressionMiddleware:
+    """
+    Negotiated response compression: brotli (if installed) or gzip.
+
+    Bodies smaller than ``minimum_size``, already encoded responses, partial
+    content and compressed media types such as images are passed through
+    unchanged. Streaming responses are compressed and flushed in blocks of
+    at least ``STREAM_FLUSH_SIZE`` bytes. Compressed responses get a weak
+    ETag.
+    """
+
+    def __init__(
+        self, app, minimum_size: int, gzip_level: int = 6, brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and _accepts(accept_encoding, "br"):
+            make_compressor = partial(BrotliCompressor, self.brotli_quality)
+        elif _accepts(accept_encoding, "gzip"):
+            make_compressor = partial(GzipCompressor, self.gzip_level)
+        else:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self.app, self.minimum_size, make_compressor)
+        await responder(scope, receive, send)
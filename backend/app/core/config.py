@@ -1,13 +1,122 @@
+from typing import List, Optional
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Student Test Platform"
     DATABASE_URL: str = "postgresql+asyncpg://postgres:postgres@db:5432/pdv_test"
+    # Optional streaming replica for read-only endpoints (listings, results)
+    READ_DATABASE_URL: Optional[str] = None
+
+    # Connection pool (per engine and per worker process). DB_STATEMENT_CACHE_SIZE
+    # is asyncpg's prepared statement cache; set 0 behind pgbouncer in
+    # transaction mode.
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
     SECRET_KEY: str = "YOUR_SUPER_SECRET_KEY_HERE"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Password hashing runs in BCRYPT_WORKERS threads (bcrypt releases the
+    # GIL), off the event loop. Stored hashes with a cost other than
+    # BCRYPT_ROUNDS are rehashed on the next successful login. At most
+    # BCRYPT_WORKERS + LOGIN_MAX_QUEUE logins are handled at a time per
+    # worker; beyond that /auth/login answers 503.
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_WORKERS: int = 2
+    LOGIN_MAX_QUEUE: int = 16
+
+    # gunicorn (gunicorn.conf.py): WEB_WORKERS uvicorn worker processes.
+    # Each worker starts its own face pool, so face processes in total are
+    # WEB_WORKERS * FACE_POOL_WORKERS.
+    WEB_BIND: str = "0.0.0.0:8000"
+    WEB_WORKERS: int = 1
+    WEB_TIMEOUT: int = 120
+    WEB_KEEPALIVE: int = 5
+
+    # Keep the face gallery in a file mapped by every worker instead of a
+    # private copy per process (enabled by gunicorn.conf.py)
+    FACE_INDEX_SHARED: bool = False
+    FACE_INDEX_PATH: str = "data/face_index.bin"
+
+    # Face processing worker processes and how many extra jobs may wait
+    # for them before requests are rejected with 503
+    FACE_POOL_WORKERS: int = 2
+    FACE_POOL_MAX_QUEUE: int = 8
+
+    # Face preprocessing: images are decoded/downscaled so the longest edge is
+    # at most FACE_DETECT_MAX_EDGE before detection. Faces smaller than
+    # FACE_ENCODE_MIN_SIZE pixels are re-cropped from a higher resolution decode.
+    FACE_DETECT_MAX_EDGE: int = 640
+    FACE_DETECTION_MODEL: str = "hog"  # 'hog' (CPU) or 'cnn'
+    FACE_DETECT_UPSAMPLE: int = 1
+    FACE_ENCODE_MIN_SIZE: int = 150
+
+    # Uploaded images, stored by content hash. Types are sniffed from the
+    # file contents; images of more than UPLOAD_MAX_PIXELS (width x height)
+    # are rejected, since decoding them for variants takes ~4 bytes per pixel.
+    UPLOAD_DIR: str = "uploads"
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_MAX_PIXELS: int = 40_000_000
+    UPLOAD_ALLOWED_TYPES: List[str] = [
+        "image/jpeg",
+        "image/png",
+        "image/gif",
+        "image/webp",
+    ]
+
+    # /uploads caching: content-addressed files are sent as immutable for
+    # UPLOAD_IMMUTABLE_MAX_AGE seconds. Stat results/ETags are kept in memory;
+    # other files are re-checked on disk after UPLOAD_STAT_TTL seconds.
+    UPLOAD_IMMUTABLE_MAX_AGE: int = 365 * 24 * 3600
+    UPLOAD_STAT_CACHE_ENTRIES: int = 10000
+    UPLOAD_STAT_TTL: float = 2
+
+    # Question/option images are also served as resized WebP and JPEG
+    # variants (never upscaled) from /uploads/variants/, one per width
+    IMAGE_VARIANT_WIDTHS: List[int] = [480, 1024]
+    IMAGE_VARIANT_QUALITY: int = 80
+
+    # Response encoding. FAST_JSON renders responses that have no pydantic
+    # response model with orjson (if installed), and plain dict/list results
+    # skip re-validation. With COMPRESSION, bodies of at least
+    # COMPRESSION_MIN_SIZE bytes are brotli (if installed) or gzip encoded.
+    FAST_JSON: bool = False
+    COMPRESSION: bool = False
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Serialized GET /tests/ payload cache (bytes of JSON kept in memory)
+    TEST_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    TEST_CACHE_TTL: int = 60
+
+    # Write-behind result inserts: submissions are spooled to a local file
+    # and inserted in batches of RESULT_BATCH_SIZE or every
+    # RESULT_FLUSH_INTERVAL seconds. RESULT_SPOOL_FSYNC also survives OS crashes.
+    RESULT_WRITE_BEHIND: bool = False
+    RESULT_BATCH_SIZE: int = 200
+    RESULT_FLUSH_INTERVAL: float = 0.5
+    RESULT_SPOOL_DIR: str = "spool"
+    RESULT_SPOOL_FSYNC: bool = False
+
+    # Analytics rollups are updated off the submit path: every
+    # ANALYTICS_ROLLUP_INTERVAL seconds, up to ANALYTICS_ROLLUP_BATCH_SIZE
+    # new results at a time are folded into the rollup tables
+    ANALYTICS_ROLLUP_INTERVAL: float = 5.0
+    ANALYTICS_ROLLUP_BATCH_SIZE: int = 5000
+
+    # Resolved users/students per token. Edits invalidate the local worker;
+    # other workers pick them up after at most PRINCIPAL_CACHE_TTL seconds.
+    PRINCIPAL_CACHE_TTL: int = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
     class Config:
         env_file = ".env"
 
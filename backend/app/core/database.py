@@ -1,13 +1,141 @@
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core import metrics
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+
+def _create_engine(url: str):
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=MeteredPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+engine = _create_engine(settings.DATABASE_URL)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Without a replica, reads share the primary engine
+read_engine = (
+    _create_engine(settings.READ_DATABASE_URL) if settings.READ_DATABASE_URL else engine
+)
+ReadSessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+for _engine in {engine, read_engine}:
+    metrics.instrument_engine(_engine)
+
 Base = declarative_base()
 
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db():
+    """
+    Session for read-only endpoints; may lag the primary by replication delay.
+
+    Not for responses that are cached (test_cache): they must be built from
+    the primary, or stale data outlives the invalidation.
+    """
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+def pool_stats() -> dict:
+    stats = {"primary": engine.pool.stats()}
+    if read_engine is not engine:
+        stats["replica"] = read_engine.pool.stats()
+    return stats
+
+
+def _pool_gauge(field: str):
+    def collect():
+        return {(name,): stats[field] for name, stats in pool_stats().items()}
+
+    return collect
+
+
+metrics.Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    ["engine"],
+    callback=_pool_gauge("checked_out"),
+)
+metrics.Gauge(
+    "db_pool_overflow",
+    "Overflow connections in use",
+    ["engine"],
+    callback=_pool_gauge("overflow"),
+)
+metrics.Gauge(
+    "db_pool_wait_seconds_total",
+    "Total time spent waiting for a pooled connection",
+    ["engine"],
+    callback=_pool_gauge("wait_seconds_total"),
+)
+metrics.Gauge(
+    "db_pool_timeouts",
+    "Checkouts that timed out waiting for a connection",
+    ["engine"],
+    callback=_pool_gauge("timeouts"),
+)
+
+
+async def dispose_engines():
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
@@ -0,0 +1,270 @@
+"""
+Minimal in-process metrics rendered in the Prometheus text format.
+
+Metrics are per worker process; scrape every worker (or sum them in the
+query) when running several. Recording is a dict lookup plus a bisect,
+cheap enough for the request path.
+"""
+
+import bisect
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds; covers sub-millisecond cache hits up to slow face requests
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        '%s="%s"'
+        % (n, str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for n, v in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_str = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {total}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge read at scrape time from ``callback`` -> {label values: value}."""
+
+    type = "gauge"
+
+    def __init__(
+        self, *args, callback: Callable[[], Dict[Tuple[str, ...], float]], **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in self.callback().items()
+        ]
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ["method", "route", "status"],
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time a request spent in database queries",
+    ["method", "route"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds", "Database statement latency", ["operation"]
+)
+FACE_STAGE_SECONDS = Histogram(
+    "face_stage_seconds",
+    "Face pipeline stage latency (decode, detect, encode, queue, compare, identify)",
+    ["stage"],
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "bcrypt hash/verify latency", ["operation"]
+)
+JWT_SECONDS = Histogram(
+    "jwt_seconds",
+    "JWT encode/decode latency",
+    ["operation"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "In-process cache lookups (principal, test_payload, answer_key) by result",
+    ["cache", "result"],
+)
+
+# Accumulates database time for the request being handled
+_request_db_time: contextvars.ContextVar[list] = contextvars.ContextVar(
+    "request_db_time"
+)
+
+
+def add_db_time(seconds: float, operation: str):
+    DB_QUERY_SECONDS.observe(seconds, operation)
+    accumulator = _request_db_time.get(None)
+    if accumulator is not None:
+        accumulator[0] += seconds
+
+
+def instrument_engine(engine):
+    """Time every statement executed through ``engine`` (a sync or async engine)."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        add_db_time(time.perf_counter() - started, operation)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        started = (
+            context.connection.info.get("query_started") if context.connection else None
+        )
+        if started:
+            started.pop()
+
+
+def _route_template(scope, root_path: str) -> str:
+    """Path template of the matched route, e.g. /api/v1/tests/{test_id}."""
+    route = scope.get("route")
+    regex = getattr(route, "path_regex", None)
+    if regex is None:
+        # Mounted apps (static files) only extend root_path
+        if scope.get("root_path", "") != root_path:
+            return scope["root_path"][len(root_path) :] + "/{path}"
+        return "unmatched"
+    # Depending on the FastAPI version, routes of an included router carry
+    # the full path or the path relative to the router prefix
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if regex.match(path[start:]):
+            return path[:start] + route.path
+        start = path.find("/", start + 1)
+    return route.path
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency per route template, method and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        root_path = scope.get("root_path", "")
+        db_time = [0.0]
+        token = _request_db_time.set(db_time)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_db_time.reset(token)
+            # Templates, not raw paths, keep the label set bounded
+            template = _route_template(scope, root_path)
+            REQUEST_SECONDS.observe(
+                elapsed, scope["method"], template, str(status_code)
+            )
+            REQUEST_DB_SECONDS.observe(db_time[0], scope["method"], template)
@@ -0,0 +1,49 @@
+import json
+from typing import Any, Mapping, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional: FAST_JSON falls back to the stdlib
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when it is installed.
+
+    orjson serializes datetimes, UUIDs, dataclasses and numpy arrays
+    itself, so content can be passed without jsonable_encoder. Without
+    orjson, anything the stdlib cannot encode goes through jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(
+                content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=jsonable_encoder,
+        ).encode("utf-8")
+
+
+def json_response(
+    content: Any, headers: Optional[Mapping[str, str]] = None
+) -> JSONResponse:
+    """
+    Response for plain dict/list data, bypassing response_model validation.
+
+    With FAST_JSON the data is dumped straight to bytes; otherwise it takes
+    the same jsonable_encoder + json.dumps route FastAPI would.
+    """
+    if settings.FAST_JSON:
+        return FastJSONResponse(content, headers=headers)
+    return JSONResponse(jsonable_encoder(content), headers=headers)
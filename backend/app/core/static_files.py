@@ -0,0 +1,152 @@
+import os
+import posixpath
+import re
+import stat
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import NamedTuple, Optional
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.services.image_variants import VARIANT_DIR, image_variants
+
+# <sha256><ext> from the upload store and variants/<sha256>-<width><ext>:
+# the name changes whenever the content does
+CONTENT_ADDRESSED = re.compile(
+    rf"^(?:{VARIANT_DIR}/)?(?P<stem>[0-9a-f]{{64}}(?:-\d+)?)\.\w+$"
+)
+
+
+class CachedFile(NamedTuple):
+    full_path: str
+    stat_result: os.stat_result
+    media_type: str
+    etag: str
+    immutable: bool
+    checked_at: float
+
+
+class UploadFiles(StaticFiles):
+    """
+    StaticFiles for /uploads.
+
+    - Content-addressed files are sent with a strong ETag (their hash) and
+      ``Cache-Control: immutable``, so browsers and proxies never revalidate
+      them; other files get ``no-cache`` and an mtime/size ETag.
+    - Stat results and ETags are kept in an in-memory LRU, so a conditional
+      request is answered with 304 without touching the disk. Entries of
+      content-addressed files never go stale; others are re-checked after
+      ``stat_ttl`` seconds. A file is stat'ed again before its body is sent,
+      and a removed file drops its entry and answers 404.
+    - Byte ranges (and If-Range) are handled by FileResponse.
+    - Missing image variants are generated on first request.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_age: int = settings.UPLOAD_IMMUTABLE_MAX_AGE,
+        max_entries: int = settings.UPLOAD_STAT_CACHE_ENTRIES,
+        stat_ttl: float = settings.UPLOAD_STAT_TTL,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.stat_ttl = stat_ttl
+        self._files: "OrderedDict[str, CachedFile]" = OrderedDict()
+
+    def _cached(self, path: str) -> Optional[CachedFile]:
+        entry = self._files.get(path)
+        if entry is None:
+            return None
+        if not entry.immutable and time.monotonic() - entry.checked_at > self.stat_ttl:
+            del self._files[path]
+            return None
+        self._files.move_to_end(path)
+        return entry
+
+    def _stat(self, path: str) -> Optional[CachedFile]:
+        """Look up a file. Blocking."""
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+
+        media_type = guess_type(full_path)[0] or "application/octet-stream"
+        match = CONTENT_ADDRESSED.match(path)
+        if match is not None:
+            etag = f'"{match["stem"]}"'
+        else:
+            etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        return CachedFile(
+            full_path, stat_result, media_type, etag, match is not None, time.monotonic()
+        )
+
+    async def _lookup(self, path: str) -> Optional[CachedFile]:
+        entry = self._cached(path)
+        if entry is not None:
+            return entry
+        try:
+            entry = await anyio.to_thread.run_sync(self._stat, path)
+        except PermissionError:
+            raise HTTPException(status_code=401)
+        except (OSError, ValueError):
+            # Name too long, null bytes etc.: cannot be a stored file
+            raise HTTPException(status_code=404)
+        if entry is not None:
+            self._files[path] = entry
+            self._files.move_to_end(path)
+            while len(self._files) > self.max_entries:
+                self._files.popitem(last=False)
+        return entry
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405, headers={"Allow": "GET, HEAD"})
+
+        entry = await self._lookup(path)
+        if entry is None:
+            directory, name = posixpath.split(path)
+            # Uploaded before variants existed (or via import): build them now
+            if directory != VARIANT_DIR or not await image_variants.ensure(name):
+                raise HTTPException(status_code=404)
+            entry = await self._lookup(path)
+            if entry is None:
+                raise HTTPException(status_code=404)
+
+        request_headers = Headers(scope=scope)
+        full_path, stat_result, etag = entry.full_path, entry.stat_result, entry.etag
+        headers = {
+            "cache-control": (
+                f"public, max-age={self.max_age}, immutable"
+                if entry.immutable
+                else "no-cache"
+            ),
+            "etag": etag,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        }
+
+        if self.is_not_modified(headers, request_headers):
+            return NotModifiedResponse(Headers(headers))
+
+        # The entry may be older than the file's removal (immutable entries
+        # are never re-checked): make sure it is still there before sending
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, full_path)
+        except OSError:
+            self._files.pop(path, None)
+            raise HTTPException(status_code=404)
+        return FileResponse(
+            full_path,
+            stat_result=stat_result,
+            headers=headers,
+            media_type=entry.media_type,
+        )
@@ -1,9 +1,17 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 import os
 
-app = FastAPI(title="Student Test Platform", version="1.0.0")
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+
+app = FastAPI(
+    title="Student Test Platform",
+    version="1.0.0",
+    default_response_class=FastJSONResponse if settings.FAST_JSON else JSONResponse,
+)
 
 # CORS Middleware
 app.add_middleware(
@@ -14,16 +22,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION:
+    from app.core.compression import CompressionMiddleware
+
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+from app.core import metrics
+
+# Outermost, so latency includes CORS and static file handling
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Mount uploads directory to serve static files
-UPLOAD_DIR = "uploads"
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
+if not os.path.exists(settings.UPLOAD_DIR):
+    os.makedirs(settings.UPLOAD_DIR)
+
+from app.core.static_files import UploadFiles
 
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+app.mount("/uploads", UploadFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
-from app.core.database import engine, Base
+from app.core.database import engine, Base, AsyncSessionLocal, dispose_engines
 from app.models import *  # Import models to ensure they are registered with Base
 from app.api.v1.endpoints import auth
+from app.services.face_index import PREBUILT_ENV, face_index
+from app.services.face_pool import face_pool
+from app.services.image_variants import image_variants
+from app.services.password_hasher import password_hasher
+from app.services.analytics import rollup_aggregator
+from app.services.result_writer import result_writer
 
 
 @app.on_event("startup")
@@ -31,6 +61,30 @@ async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+    # Build the face gallery used for 1:N identification, unless the
+    # gunicorn master already built the shared file for all workers
+    if os.environ.get(PREBUILT_ENV) != "1":
+        async with AsyncSessionLocal() as db:
+            await face_index.load(db)
+
+    face_pool.start()
+    # Source widths for srcsets, recorded when variants were generated
+    await run_in_threadpool(image_variants.load)
+
+    if settings.RESULT_WRITE_BEHIND:
+        await result_writer.start()
+
+    rollup_aggregator.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    face_pool.shutdown()
+    password_hasher.shutdown()
+    await result_writer.stop()
+    await rollup_aggregator.stop()
+    await dispose_engines()
+
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 from app.api.v1.endpoints import students, tests, upload
@@ -44,6 +98,18 @@ from app.api.v1.endpoints import teachers, subjects
 app.include_router(teachers.router, prefix="/api/v1/teachers", tags=["teachers"])
 app.include_router(subjects.router, prefix="/api/v1/subjects", tags=["subjects"])
 
+from app.api.v1.endpoints import internal
+
+app.include_router(internal.router, prefix="/api/v1/internal", tags=["internal"])
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    # Prometheus text exposition format, per worker process
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 
 @app.get("/")
 async def root():
@@ -1,6 +1,12 @@
 from app.models.user import User
 from app.models.student import Student
 from app.models.teacher import Teacher
-from app.models.test import Test, Question, Result
+from app.models.test import (
+    Test,
+    Question,
+    Result,
+    QuestionOptionStat,
+    ScoreBucketStat,
+)
 from app.models.subject import Subject
 from app.core.database import Base
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ARRAY, Float
+from sqlalchemy import Column, Integer, String
 from app.core.database import Base
+from app.models.types import FaceEncoding
 
 
 class Student(Base):
@@ -11,5 +12,6 @@ class Student(Base):
     group_id = Column(String, index=True)
     photo_path = Column(String, nullable=True)
 
-    # Store face encoding as a list of floats (128 dimensions for dlib/face_recognition)
-    face_encoding = Column(ARRAY(Float), nullable=True)
+    # Face encoding (128 dimensions for dlib/face_recognition) as packed float32,
+    # loaded as a NumPy array
+    face_encoding = Column(FaceEncoding, nullable=True)
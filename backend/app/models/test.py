@@ -1,6 +1,18 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, Float
+from sqlalchemy import (
+    ARRAY,
+    Boolean,
+    Column,
+    Integer,
+    SmallInteger,
+    String,
+    ForeignKey,
+    JSON,
+    DateTime,
+    Float,
+    Index,
+)
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import expression, func
 from app.core.database import Base
 from app.models.student import Student
 
@@ -12,12 +24,21 @@ class Test(Base):
     title = Column(String, index=True)
     description = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every edit; cached answer keys are stamped with it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     subject_id = Column(
         Integer, ForeignKey("subjects.id"), nullable=True
     )  # nullable for back-compat or logic? Start nullable.
 
     subject = relationship("app.models.subject.Subject", back_populates="tests")
-    questions = relationship("Question", back_populates="test")
+    questions = relationship(
+        "Question", back_populates="test", order_by="Question.position"
+    )
+
+    __table_args__ = (
+        # Summary listing filtered by subject, keyset-paginated on id
+        Index("ix_tests_subject_id_id", "subject_id", "id"),
+    )
 
 
 class Question(Base):
@@ -31,9 +52,17 @@ class Question(Base):
         JSON
     )  # List of strings or objects. Now supports objects like {text: "...", image: "..."}
     correct_option = Column(Integer)  # Index of the correct option
+    # Place in the test as arranged in the editor; answers and answer keys
+    # are in this order
+    position = Column(Integer, nullable=False, default=0, server_default="0")
 
     test = relationship("Test", back_populates="questions")
 
+    __table_args__ = (
+        # Questions of a test in order (answer keys, selectinload)
+        Index("ix_questions_test_id_position", "test_id", "position"),
+    )
+
 
 class Result(Base):
     __tablename__ = "results"
@@ -42,7 +71,61 @@ class Result(Base):
     student_id = Column(Integer, ForeignKey("students.id"))
     test_id = Column(Integer, ForeignKey("tests.id"))
     score = Column(Float)
+    # Chosen option per question in question order, -1 = unanswered
+    answers = Column(ARRAY(SmallInteger), nullable=True)
+    # Test version the answers refer to
+    test_version = Column(Integer, nullable=True)
     taken_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set by the write-behind queue so replayed spool rows are inserted once
+    submission_id = Column(String, unique=True, nullable=True)
+    # Counted in the analytics rollups (analytics.RollupAggregator)
+    rolled_up = Column(
+        Boolean, nullable=False, default=False, server_default=expression.false()
+    )
 
     student = relationship("Student")
     test = relationship("Test")
+
+    __table_args__ = (
+        Index("ix_results_student_id_taken_at", "student_id", "taken_at"),
+        Index("ix_results_test_id_taken_at", "test_id", "taken_at"),
+        # Keyset pagination of the unfiltered results listing; taken_at is
+        # nullable, NULLs sort last (see RESULT_SORT_TIME in the endpoint)
+        Index(
+            "ix_results_sort_time_id",
+            expression.text("coalesce(taken_at, '-infinity'::timestamptz)"),
+            "id",
+        ),
+        # Results not yet rolled up, oldest first
+        Index(
+            "ix_results_pending_rollup",
+            "id",
+            postgresql_where=expression.text("NOT rolled_up"),
+        ),
+    )
+
+
+class QuestionOptionStat(Base):
+    """Rollup: submissions per (question position, chosen option) of a test version."""
+
+    __tablename__ = "question_option_stats"
+
+    test_id = Column(
+        Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True
+    )
+    test_version = Column(Integer, primary_key=True)
+    position = Column(Integer, primary_key=True)
+    option = Column(SmallInteger, primary_key=True)  # -1 = unanswered
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ScoreBucketStat(Base):
+    """Rollup: submissions per 10-point score bucket (0 = 0-10%, 9 = 90-100%)."""
+
+    __tablename__ = "score_bucket_stats"
+
+    test_id = Column(
+        Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True
+    )
+    bucket = Column(SmallInteger, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,36 @@
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Big-endian float32 is what Postgres' float4send() produces, so existing
+# float arrays can be converted to this format entirely in SQL
+FACE_ENCODING_DTYPE = np.dtype(">f4")
+
+
+class FaceEncoding(TypeDecorator):
+    """
+    Face embedding stored as packed float32 bytes (512 bytes for 128 dims).
+
+    Accepts any sequence of floats or NumPy array when writing and returns a
+    read-only NumPy view over the raw column bytes when reading, so no
+    per-element Python float objects are created.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return np.asarray(value, dtype=FACE_ENCODING_DTYPE).tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype=FACE_ENCODING_DTYPE)
+
+    def compare_values(self, x, y):
+        # Default == would compare arrays element-wise
+        if x is None or y is None:
+            return x is y
+        return np.array_equal(x, y)
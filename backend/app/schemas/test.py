@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import List, Optional, Union, Dict
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional, Union, Dict
+from pydantic import BaseModel, Field, computed_field
+from typing_extensions import TypedDict
 from app.schemas.subject import Subject as SubjectSchema  # Import
+from app.services.image_variants import image_variants
 
 
 class QuestionBase(BaseModel):
@@ -19,10 +21,30 @@ class QuestionCreate(QuestionBase):
     pass
 
 
+class ImageVariantSet(TypedDict):
+    webp: str  # srcset
+    jpeg: str  # srcset
+    src: str  # fallback for clients without srcset support
+
+
 class Question(QuestionBase):
     id: int
     test_id: int
 
+    @computed_field
+    @property
+    def image_variants(self) -> Dict[str, ImageVariantSet]:
+        """Resized variants of the question and option images, by original URL."""
+        urls = [self.image] + [
+            o.get("image") for o in self.options if isinstance(o, dict)
+        ]
+        variants = {}
+        for url in urls:
+            srcsets = image_variants.srcsets(url)
+            if srcsets is not None:
+                variants[url] = srcsets
+        return variants
+
     class Config:
         from_attributes = True
 
@@ -37,12 +59,20 @@ class TestCreate(TestBase):
     questions: List[QuestionCreate]
 
 
+class QuestionUpdate(QuestionBase):
+    # Existing question to update in place; omit for new questions.
+    # Existing questions missing from the update are deleted.
+    id: Optional[int] = None
+
+
 class TestUpdate(TestBase):
-    questions: List[QuestionCreate]
+    questions: List[QuestionUpdate]
 
 
 class Test(TestBase):
     id: int
+    # Send back with the answers (ResultSubmit.version)
+    version: int = 1
     questions: List[Question] = []
     subject: Optional[SubjectSchema] = None
 
@@ -50,6 +80,57 @@ class Test(TestBase):
         from_attributes = True
 
 
+class QuestionChanges(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+
+class TestUpdateResult(Test):
+    changes: QuestionChanges
+
+
+class TestSummary(TestBase):
+    id: int
+    created_at: Optional[datetime] = None
+    subject_name: Optional[str] = None
+    question_count: int = 0
+
+
+class TestSummaryPage(BaseModel):
+    items: List[TestSummary]
+    next_cursor: Optional[int] = None  # pass as ?cursor= to get the next page
+
+
 class ResultSubmit(BaseModel):
     test_id: int
-    answers: List[int]
+    # Test.version the answers were given against; rejected with 409 if the
+    # test has been edited since
+    version: Optional[int] = None
+    # Chosen option index per question, -1 = unanswered; stored as smallint
+    answers: List[Annotated[int, Field(ge=-1, le=32767)]]
+
+
+class ScoreBucket(BaseModel):
+    min_score: int
+    max_score: int
+    count: int
+
+
+class QuestionStats(BaseModel):
+    position: int  # index in question order, as in ResultSubmit.answers
+    question_id: Optional[int] = None
+    correct_option: Optional[int] = None
+    option_counts: Dict[int, int]  # option index -> count, -1 = unanswered
+    answered: int
+    unanswered: int
+    correct: Optional[int] = None
+    difficulty: Optional[float] = None  # share of answering students who were correct
+
+
+class TestAnalytics(BaseModel):
+    test_id: int
+    version: int
+    submissions: int
+    score_histogram: List[ScoreBucket]
+    questions: List[QuestionStats]
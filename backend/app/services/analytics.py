@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import Integer, any_, bindparam, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.test import Result, QuestionOptionStat, ScoreBucketStat
+from app.services.answer_keys import AnswerKey
+
+logger = logging.getLogger(__name__)
+
+UNANSWERED = -1
+SMALLINT_MAX = 32767
+SCORE_BUCKETS = 10
+# Rows per upsert statement, well below asyncpg's parameter limit
+UPSERT_CHUNK = 1000
+
+
+def pack_answers(key: AnswerKey, answers: List[int]) -> List[int]:
+    """One smallint per question in key order; missing/invalid answers are -1."""
+    packed = np.full(len(key.correct), UNANSWERED, dtype=np.int64)
+    given = np.asarray(answers[: len(packed)], dtype=np.int64)
+    packed[: len(given)] = given
+    packed[(packed < 0) | (packed > SMALLINT_MAX)] = UNANSWERED
+    return packed.tolist()
+
+
+def score_bucket(score: float) -> int:
+    return min(int(score // (100 / SCORE_BUCKETS)), SCORE_BUCKETS - 1)
+
+
+def new_result_row(
+    student_id: int, test_id: int, key: AnswerKey, answers: List[int], score: float
+) -> dict:
+    """Build a result row ready for insert_results (or the write-behind queue)."""
+    return {
+        "submission_id": str(uuid.uuid4()),
+        "student_id": student_id,
+        "test_id": test_id,
+        "test_version": key.version,
+        "score": score,
+        "answers": pack_answers(key, answers),
+        "taken_at": datetime.now(timezone.utc),
+    }
+
+
+async def insert_results(db: AsyncSession, rows: List[dict]):
+    """
+    Insert result rows; the rollup aggregator counts them later.
+
+    Rows already present (same submission_id, e.g. a replayed spool) are
+    skipped. Does not commit.
+    """
+    await db.execute(
+        insert(Result)
+        .values(
+            [
+                {
+                    "submission_id": r["submission_id"],
+                    "student_id": r["student_id"],
+                    "test_id": r["test_id"],
+                    "score": r["score"],
+                    "answers": r["answers"],
+                    "test_version": r["test_version"],
+                    "taken_at": r["taken_at"],
+                }
+                for r in rows
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["submission_id"])
+    )
+
+
+def pending_rollups_query(limit: int):
+    """Claim up to ``limit`` results not yet counted, oldest first."""
+    return (
+        select(
+            Result.id,
+            Result.test_id,
+            Result.test_version,
+            Result.score,
+            Result.answers,
+        )
+        .where(~Result.rolled_up)  # matches ix_results_pending_rollup
+        .order_by(Result.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+
+async def roll_up_pending(db: AsyncSession, limit: int) -> int:
+    """
+    Fold up to ``limit`` results not yet counted into the rollups and mark
+    them. Rows are locked with SKIP LOCKED, so several workers can run this
+    at once without counting a row twice. Does not commit.
+    """
+    result = await db.execute(pending_rollups_query(limit))
+    rows = [row._asdict() for row in result.all()]
+    if not rows:
+        return 0
+
+    await _update_rollups(db, rows)
+    ids = [r["id"] for r in rows]
+    await db.execute(
+        update(Result)
+        .where(Result.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))))
+        .values(rolled_up=True)
+    )
+    return len(rows)
+
+
+async def _update_rollups(db: AsyncSession, rows: List[dict]):
+    rows = [r for r in rows if r["test_id"] is not None]
+    if not rows:
+        return
+
+    buckets = Counter(
+        (r["test_id"], score_bucket(r["score"]))
+        for r in rows
+        if r["score"] is not None
+    )
+
+    # Option counts per test version, computed with one np.unique per group
+    groups = defaultdict(list)
+    for r in rows:
+        if r["answers"] and r["test_version"] is not None:
+            groups[(r["test_id"], r["test_version"])].append(r["answers"])
+
+    option_stats = []
+    for (test_id, version), answers in groups.items():
+        width = max(len(a) for a in answers)
+        matrix = np.full((len(answers), width), UNANSWERED, dtype=np.int64)
+        for i, a in enumerate(answers):
+            matrix[i, : len(a)] = a
+        positions = np.broadcast_to(np.arange(width), matrix.shape)
+        pairs, counts = np.unique(
+            np.stack([positions.ravel(), matrix.ravel()], axis=1),
+            axis=0,
+            return_counts=True,
+        )
+        option_stats.extend(
+            {
+                "test_id": test_id,
+                "test_version": version,
+                "position": int(position),
+                "option": int(option),
+                "count": int(count),
+            }
+            for (position, option), count in zip(pairs, counts)
+        )
+
+    await _upsert_counts(
+        db,
+        ScoreBucketStat,
+        ["test_id", "bucket"],
+        [
+            {"test_id": test_id, "bucket": bucket, "count": count}
+            for (test_id, bucket), count in buckets.items()
+        ],
+    )
+    await _upsert_counts(
+        db,
+        QuestionOptionStat,
+        ["test_id", "test_version", "position", "option"],
+        option_stats,
+    )
+
+
+async def _upsert_counts(db: AsyncSession, model, keys: List[str], rows: List[dict]):
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        stmt = insert(model).values(rows[start : start + UPSERT_CHUNK])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=keys, set_={"count": model.count + stmt.excluded.count}
+            )
+        )
+
+
+class RollupAggregator:
+    """
+    Background task that keeps the analytics rollups up to date.
+
+    Submissions only insert their ``results`` row, so concurrent submits of
+    the same test never wait on each other's rollup row locks. Every
+    ``interval`` seconds new results are counted in batches of
+    ``batch_size``, each in its own transaction; the rollups lag behind
+    submissions by about one interval.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> int:
+        """Roll up everything pending; returns the number of results counted."""
+        total = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                count = await roll_up_pending(db, self.batch_size)
+                await db.commit()
+            total += count
+            if count < self.batch_size:
+                return total
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                # Uncounted rows stay pending; retry on the next tick
+                logger.error(f"Error updating analytics rollups: {e}")
+            await asyncio.sleep(self.interval)
+
+
+rollup_aggregator = RollupAggregator(
+    settings.ANALYTICS_ROLLUP_INTERVAL, settings.ANALYTICS_ROLLUP_BATCH_SIZE
+)
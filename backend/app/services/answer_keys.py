@@ -0,0 +1,82 @@
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.metrics import CACHE_LOOKUPS
+from app.models.test import Test, Question
+
+
+class AnswerKey(NamedTuple):
+    version: int
+    # Correct option index per question, in question (position) order
+    correct: np.ndarray
+
+
+def answer_key_query(test_id: int):
+    """The test's version with its correct options, in question order."""
+    return (
+        select(Test.version, Question.correct_option)
+        .outerjoin(Question, Question.test_id == Test.id)
+        .where(Test.id == test_id)
+        .order_by(Question.position)
+    )
+
+
+class AnswerKeyCache:
+    """
+    Per-test cache of correct answers for scoring submissions.
+
+    Each key is stamped with the test's ``version``; a submission only reads
+    that one column from ``tests`` and reloads the questions only when the
+    test has been edited since the key was built.
+    """
+
+    def __init__(self):
+        self._keys: Dict[int, AnswerKey] = {}
+
+    async def get(self, db: AsyncSession, test_id: int) -> Optional[AnswerKey]:
+        """Return the current answer key, or None if the test does not exist."""
+        result = await db.execute(select(Test.version).where(Test.id == test_id))
+        version = result.scalar_one_or_none()
+        if version is None:
+            self._keys.pop(test_id, None)
+            return None
+
+        key = self._keys.get(test_id)
+        if key is not None and key.version == version:
+            CACHE_LOOKUPS.inc("answer_key", "hit")
+        else:
+            CACHE_LOOKUPS.inc("answer_key", "miss")
+            # Version and questions from one statement (one snapshot): an
+            # edit committed in between must not file the new questions
+            # under the old version
+            result = await db.execute(answer_key_query(test_id))
+            rows = result.all()
+            if not rows:
+                self._keys.pop(test_id, None)
+                return None
+            # Same width as the Integer column: int8 would wrap above 127
+            correct = np.array(
+                [r.correct_option for r in rows if r.correct_option is not None],
+                dtype=np.int32,
+            )
+            key = self._keys[test_id] = AnswerKey(rows[0].version, correct)
+        return key
+
+    def invalidate(self, test_id: int):
+        self._keys.pop(test_id, None)
+
+
+def score_answers(key: AnswerKey, answers: List[int]) -> float:
+    """Percentage of answers matching the key (answers are in question order)."""
+    total = len(key.correct)
+    if total == 0:
+        return 0
+    given = np.asarray(answers[:total], dtype=np.int64)
+    correct_count = np.count_nonzero(key.correct[: len(given)] == given)
+    return (int(correct_count) / total) * 100
+
+
+answer_keys = AnswerKeyCache()
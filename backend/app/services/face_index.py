@@ -0,0 +1,242 @@
+import fcntl
+import os
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.student import Student
+
+# dlib/face_recognition embeddings are 128-dimensional
+ENCODING_SIZE = 128
+
+# Shared index file: header, then int64 ids[count], then float32 matrix[count, 128]
+FILE_MAGIC = b"PDVFIDX1"
+HEADER_SIZE = 32
+# Set by gunicorn.conf.py once the master has built the shared index file
+PREBUILT_ENV = "FACE_INDEX_PREBUILT"
+
+
+class FaceIndex:
+    """
+    Process-resident gallery of every enrolled face encoding.
+
+    Encodings live in one contiguous float32 matrix (row i belongs to
+    ``ids[i]``, the Student primary key), so a 1:N lookup is a single
+    vectorized distance computation instead of a Python loop over students.
+    """
+
+    def __init__(self):
+        self._matrix = np.empty((0, ENCODING_SIZE), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[: self._size]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[: self._size]
+
+    def _reserve(self, capacity: int):
+        # Grow geometrically so single enrollments stay amortized O(1)
+        if capacity <= self._matrix.shape[0]:
+            return
+        new_capacity = max(capacity, self._matrix.shape[0] * 2, 64)
+        matrix = np.empty((new_capacity, ENCODING_SIZE), dtype=np.float32)
+        ids = np.empty(new_capacity, dtype=np.int64)
+        matrix[: self._size] = self._matrix[: self._size]
+        ids[: self._size] = self._ids[: self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def replace(self, ids: Sequence[int], encodings: Sequence) -> None:
+        """Replace the whole gallery (used when (re)building from the DB)."""
+        count = len(ids)
+        matrix = np.empty((max(count, 64), ENCODING_SIZE), dtype=np.float32)
+        if count:
+            matrix[:count] = np.asarray(encodings, dtype=np.float32)
+        id_array = np.empty(matrix.shape[0], dtype=np.int64)
+        id_array[:count] = ids
+        self._matrix, self._ids, self._size = matrix, id_array, count
+
+    def add(self, student_db_id: int, encoding) -> None:
+        """Add or overwrite the encoding for one student."""
+        vector = np.asarray(encoding, dtype=np.float32)
+        if vector.shape != (ENCODING_SIZE,):
+            raise ValueError(f"Expected a {ENCODING_SIZE}-d face encoding")
+
+        existing = np.flatnonzero(self.ids == student_db_id)
+        if existing.size:
+            self._matrix[existing[0]] = vector
+            return
+
+        self._reserve(self._size + 1)
+        self._matrix[self._size] = vector
+        self._ids[self._size] = student_db_id
+        self._size += 1
+
+    def add_many(self, items: Iterable[Tuple[int, Sequence]]) -> None:
+        """Add or overwrite several (student_db_id, encoding) pairs."""
+        for student_db_id, encoding in items:
+            self.add(student_db_id, encoding)
+
+    async def enroll(self, student_db_id: int, encoding) -> None:
+        """``add`` for async callers."""
+        self.add(student_db_id, encoding)
+
+    async def enroll_many(self, items: Iterable[Tuple[int, Sequence]]) -> None:
+        """``add_many`` for async callers."""
+        self.add_many(items)
+
+    def distances(self, encoding) -> np.ndarray:
+        """Euclidean distance from ``encoding`` to every enrolled face."""
+        query = np.asarray(encoding, dtype=np.float32)
+        diff = self.matrix - query
+        # Same metric as face_recognition.face_distance, without the per-row loop
+        return np.sqrt(np.einsum("ij,ij->i", diff, diff))
+
+    def nearest(self, encoding, k: int = 1) -> List[Tuple[int, float]]:
+        """Return up to ``k`` (student_db_id, distance) pairs, closest first."""
+        if self._size == 0:
+            return []
+        dists = self.distances(encoding)
+        k = min(k, self._size)
+        if k < self._size:
+            candidates = np.argpartition(dists, k - 1)[:k]
+        else:
+            candidates = np.arange(self._size)
+        order = candidates[np.argsort(dists[candidates])]
+        return [(int(self.ids[i]), float(dists[i])) for i in order]
+
+    def identify(self, encoding, tolerance: float = 0.6) -> Optional[int]:
+        """Return the closest student's DB id if within ``tolerance``."""
+        best = self.nearest(encoding, k=1)
+        if best and best[0][1] <= tolerance:
+            return best[0][0]
+        return None
+
+    async def load(self, db: AsyncSession) -> None:
+        """Build the gallery from every student that has a face encoding."""
+        result = await db.execute(
+            select(Student.id, Student.face_encoding).where(
+                Student.face_encoding.isnot(None)
+            )
+        )
+        rows = result.all()
+        await run_in_threadpool(
+            self.replace, [r[0] for r in rows], [r[1] for r in rows]
+        )
+
+
+class MappedFaceIndex(FaceIndex):
+    """
+    FaceIndex backed by a file that every worker process maps read-only.
+
+    The OS page cache holds one copy of the gallery however many workers
+    there are. Changes are written to a new file under an exclusive lock
+    and swapped in with ``os.replace``; readers notice the new inode on
+    their next lookup and remap, while lookups already running keep the
+    old mapping. Each change rewrites the whole file, so enroll in batches
+    (``add_many``) where possible.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._file_key = None
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._file_key = None
+            FaceIndex.replace(self, [], [])
+            return
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key == self._file_key:
+            return
+
+        data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if bytes(data[: len(FILE_MAGIC)]) != FILE_MAGIC:
+            raise ValueError(f"{self.path} is not a face index file")
+        count, size = data[8:24].view(np.int64)
+        if size != ENCODING_SIZE:
+            raise ValueError(f"{self.path} holds {size}-d encodings")
+        ids_end = HEADER_SIZE + 8 * count
+        self._ids = data[HEADER_SIZE:ids_end].view(np.int64)
+        self._matrix = (
+            data[ids_end : ids_end + 4 * ENCODING_SIZE * count]
+            .view(np.float32)
+            .reshape(count, ENCODING_SIZE)
+        )
+        self._size = int(count)
+        self._file_key = key
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._size
+
+    def nearest(self, encoding, k: int = 1) -> List[Tuple[int, float]]:
+        self._refresh()
+        return super().nearest(encoding, k)
+
+    def _write(self, index: FaceIndex):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        header = np.zeros(HEADER_SIZE, dtype=np.uint8)
+        header[: len(FILE_MAGIC)] = np.frombuffer(FILE_MAGIC, dtype=np.uint8)
+        header[8:24] = np.array([len(index), ENCODING_SIZE], dtype=np.int64).view(
+            np.uint8
+        )
+        with open(tmp_path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(np.ascontiguousarray(index.ids, dtype=np.int64).tobytes())
+            f.write(np.ascontiguousarray(index.matrix, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _update(self, change):
+        """Apply ``change`` to a private copy of the current file and publish it."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            self._refresh()
+            index = FaceIndex()
+            FaceIndex.replace(index, self.ids, self.matrix)
+            change(index)
+            self._write(index)
+        self._refresh()
+
+    def replace(self, ids: Sequence[int], encodings: Sequence) -> None:
+        self._update(lambda index: index.replace(ids, encodings))
+
+    def add(self, student_db_id: int, encoding) -> None:
+        self._update(lambda index: index.add(student_db_id, encoding))
+
+    def add_many(self, items: Iterable[Tuple[int, Sequence]]) -> None:
+        items = list(items)
+        self._update(lambda index: index.add_many(items))
+
+    # Rewriting and fsyncing the file (and waiting for the lock) blocks, so
+    # async callers do it in a worker thread
+    async def enroll(self, student_db_id: int, encoding) -> None:
+        await run_in_threadpool(self.add, student_db_id, encoding)
+
+    async def enroll_many(self, items: Iterable[Tuple[int, Sequence]]) -> None:
+        await run_in_threadpool(self.add_many, list(items))
+
+
+def _create_face_index() -> FaceIndex:
+    if settings.FACE_INDEX_SHARED:
+        return MappedFaceIndex(settings.FACE_INDEX_PATH)
+    return FaceIndex()
+
+
+face_index = _create_face_index()
@@ -0,0 +1,85 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+
+def _warm_up():
+    # Load the dlib models once per worker process instead of on the first request
+    import face_recognition  # noqa: F401
+
+
+class FacePool:
+    """
+    Bounded process pool for CPU-heavy face detection/encoding.
+
+    dlib work runs in separate processes so the event loop keeps serving
+    other requests. At most ``workers + max_queue`` jobs are admitted at a
+    time; beyond that requests are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # "spawn" avoids forking a process that already runs an event loop
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up,
+        )
+
+    def start(self):
+        if self._executor is not None:
+            return
+        self._executor = self._new_executor()
+        self._slots = asyncio.Semaphore(self.workers + self.max_queue)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable, *args, wait: bool = False) -> Any:
+        """
+        Run ``fn(*args)`` in a worker process.
+
+        With ``wait=False`` (interactive requests) a full queue raises 503
+        immediately; ``wait=True`` (batch jobs) waits for a free slot instead.
+        """
+        if self._executor is None:
+            self.start()
+
+        if not wait and self._slots.locked():
+            raise HTTPException(
+                status_code=503,
+                detail="Face processing is busy, please try again",
+                headers={"Retry-After": "1"},
+            )
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            executor = self._executor
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM on a huge image); replace the pool once
+                if self._executor is executor:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = self._new_executor()
+                raise HTTPException(
+                    status_code=503,
+                    detail="Face processing is restarting, please try again",
+                    headers={"Retry-After": "1"},
+                )
+
+
+face_pool = FacePool(settings.FACE_POOL_WORKERS, settings.FACE_POOL_MAX_QUEUE)
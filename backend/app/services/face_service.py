@@ -1,6 +1,113 @@
+import io
+import logging
+import time
+
 import face_recognition
 import numpy as np
 from fastapi import UploadFile, HTTPException
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.core.metrics import FACE_STAGE_SECONDS
+from app.services.face_pool import face_pool
+
+logger = logging.getLogger(__name__)
+
+# Extra context kept around a face when re-cropping it at higher resolution,
+# as a fraction of the face box. The landmark model needs some room around it.
+CROP_MARGIN = 0.5
+
+
+def decode_image(image_data: bytes, max_edge: int) -> np.ndarray:
+    """
+    Decode an image to an RGB array whose longest edge is at most ``max_edge``.
+
+    For JPEGs ``draft`` lets libjpeg decode at 1/2, 1/4 or 1/8 scale directly,
+    so a 12 MP photo is never materialized at full resolution.
+    """
+    image = Image.open(io.BytesIO(image_data))
+    # draft keeps both edges at or above the requested size, so ask for the
+    # target size in the image's own aspect ratio (a square box would pin
+    # the short edge and disable the reduction for landscape photos)
+    scale = max_edge / max(image.size)
+    if scale < 1:
+        image.draft("RGB", (int(image.width * scale), int(image.height * scale)))
+    # Phone cameras store rotation in EXIF rather than in the pixels
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image.thumbnail((max_edge, max_edge))
+    return np.asarray(image)
+
+
+def encode_image_bytes(image_data: bytes) -> dict:
+    """
+    Detect and encode every face in an image.
+
+    Detection runs on a downscaled copy. If the detected face is too small to
+    encode reliably, only the face region is re-decoded at the resolution the
+    encoder needs. Returns the encodings plus per-stage timings in ms.
+
+    Runs inside a face pool worker process, so it must stay a plain
+    module-level function that only takes and returns picklable values.
+    """
+    timings = {}
+
+    started = time.perf_counter()
+    small = decode_image(image_data, settings.FACE_DETECT_MAX_EDGE)
+    timings["decode"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    locations = face_recognition.face_locations(
+        small,
+        number_of_times_to_upsample=settings.FACE_DETECT_UPSAMPLE,
+        model=settings.FACE_DETECTION_MODEL,
+    )
+    timings["detect"] = (time.perf_counter() - started) * 1000
+
+    if len(locations) != 1:
+        # The caller only accepts exactly one face; skip the encoding work
+        return {"encodings": [None] * len(locations), "timings": timings}
+
+    started = time.perf_counter()
+    top, right, bottom, left = locations[0]
+    face_size = bottom - top
+
+    if face_size >= settings.FACE_ENCODE_MIN_SIZE:
+        image, location = small, locations[0]
+    else:
+        image, location = _crop_face(image_data, small, locations[0])
+
+    encodings = face_recognition.face_encodings(image, known_face_locations=[location])
+    timings["encode"] = (time.perf_counter() - started) * 1000
+
+    return {"encodings": encodings, "timings": timings}
+
+
+def _crop_face(image_data: bytes, small: np.ndarray, location: tuple):
+    """Re-decode just enough resolution for the face and crop around it."""
+    top, right, bottom, left = location
+    face_size = max(bottom - top, 1)
+
+    # Upscale factor needed for the face to reach the encoder's chip size,
+    # never beyond what the original image actually has
+    scale = settings.FACE_ENCODE_MIN_SIZE / face_size
+    max_edge = int(max(small.shape[:2]) * scale)
+    large = decode_image(image_data, max_edge)
+    scale = large.shape[0] / small.shape[0]
+
+    margin = face_size * CROP_MARGIN
+    crop_top = max(int((top - margin) * scale), 0)
+    crop_left = max(int((left - margin) * scale), 0)
+    crop_bottom = min(int((bottom + margin) * scale), large.shape[0])
+    crop_right = min(int((right + margin) * scale), large.shape[1])
+
+    crop = np.ascontiguousarray(large[crop_top:crop_bottom, crop_left:crop_right])
+    crop_location = (
+        int(top * scale) - crop_top,
+        int(right * scale) - crop_left,
+        int(bottom * scale) - crop_top,
+        int(left * scale) - crop_left,
+    )
+    return crop, crop_location
 
 
 class FaceService:
@@ -8,46 +115,52 @@ class FaceService:
     async def get_face_encoding(file: UploadFile):
         # Read image file
         image_data = await file.read()
+        return await FaceService.encode_bytes(image_data)
 
-        # Load image with face_recognition (requires numpy array)
+    @staticmethod
+    async def encode_bytes(image_data: bytes, wait: bool = False):
+        # Detection/encoding is CPU-bound, keep it off the event loop.
+        # Batch callers pass wait=True to queue for a worker instead of a 503.
+        started = time.perf_counter()
         try:
-            # We need to save it to a temp file or convert byte stream to numpy array
-            # For simplicity using a temp file approach or assuming we can load from bytes slightly differently
-            # face_recognition.load_image_file accepts a filename or file object.
-            # SpooledTemporaryFile from UploadFile works as a file object.
-
-            # Reset file pointer
-            await file.seek(0)
-
-            image = face_recognition.load_image_file(file.file)
-            encodings = face_recognition.face_encodings(image)
+            processed = await face_pool.run(encode_image_bytes, image_data, wait=wait)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error processing image: {str(e)}"
+            )
 
-            if not encodings:
-                raise HTTPException(
-                    status_code=400, detail="No face found in the image"
-                )
+        timings = processed["timings"]
+        logger.debug("Face pipeline timings (ms): %s", timings)
+        for stage, ms in timings.items():
+            FACE_STAGE_SECONDS.observe(ms / 1000, stage)
+        # Whatever the worker did not account for: waiting for a free
+        # worker plus pickling the image and result across processes
+        queued = time.perf_counter() - started - sum(timings.values()) / 1000
+        FACE_STAGE_SECONDS.observe(max(queued, 0.0), "queue")
+        encodings = processed["encodings"]
 
-            if len(encodings) > 1:
-                raise HTTPException(
-                    status_code=400, detail="Multiple faces found in the image"
-                )
+        if not encodings:
+            raise HTTPException(status_code=400, detail="No face found in the image")
 
-            return encodings[0].tolist()  # Convert numpy array to list for JSON storage
-        except Exception as e:
+        if len(encodings) > 1:
             raise HTTPException(
-                status_code=500, detail=f"Error processing image: {str(e)}"
+                status_code=400, detail="Multiple faces found in the image"
             )
 
+        return encodings[0].tolist()  # Convert numpy array to list for JSON storage
+
     @staticmethod
-    def verify_face(
-        known_encoding: list, check_encoding: list, tolerance: float = 0.6
-    ) -> bool:
-        # data comes from DB as list, convert back to numpy array
-        known_face_encoding = np.array(known_encoding)
-        check_face_encoding = np.array(check_encoding)
+    def verify_face(known_encoding, check_encoding, tolerance: float = 0.6) -> bool:
+        # known_encoding comes from the DB as a float32 array, check_encoding
+        # as a list from get_face_encoding
+        known_face_encoding = np.asarray(known_encoding, dtype=np.float64)
+        check_face_encoding = np.asarray(check_encoding, dtype=np.float64)
 
         # compare_faces returns a list of True/False
-        results = face_recognition.compare_faces(
-            [known_face_encoding], check_face_encoding, tolerance=tolerance
-        )
+        with FACE_STAGE_SECONDS.time("compare"):
+            results = face_recognition.compare_faces(
+                [known_face_encoding], check_face_encoding, tolerance=tolerance
+            )
         return results[0]
@@ -0,0 +1,298 @@
+import asyncio
+import os
+import re
+import tempfile
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+
+from PIL import ExifTags, Image, ImageOps
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+VARIANT_DIR = "variants"
+# Source extensions that get variants; GIFs may be animated and are served as is
+SOURCE_EXTENSIONS = (".jpg", ".png", ".webp")
+# URL extension -> (Pillow format, save options)
+FORMATS = {
+    "webp": ("WEBP", {"method": 4}),
+    "jpg": ("JPEG", {"optimize": True, "progressive": True}),
+}
+VARIANT_NAME = re.compile(r"^(?P<stem>[\w-]+)-(?P<width>\d+)\.(?P<ext>webp|jpg)$")
+# variants/<stem>.width holds the displayed width of the source, so other
+# workers and restarts do not have to open the image again
+WIDTH_SUFFIX = ".width"
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+class ImageVariants:
+    """
+    Resized, recompressed copies of uploaded images.
+
+    ``/uploads/<stem><ext>`` gets ``/uploads/variants/<stem>-<width>.webp``
+    and ``.jpg`` for every configured width. Images are never upscaled, so a
+    variant wider than its source is just the recompressed original; srcsets
+    list it once, with its real width. Missing files are generated on demand.
+    Sources that cannot be decoded (or exceed ``max_pixels``) are remembered
+    and get no variants.
+
+    srcsets are built from source widths recorded when variants are
+    generated, never by opening files: they are needed while serializing
+    responses, on the event loop. An image whose width is not known yet gets
+    no srcset until its (background) generation has finished.
+    """
+
+    def __init__(
+        self, directory: str, widths: List[int], quality: int, max_pixels: int
+    ):
+        self.directory = os.path.join(directory, VARIANT_DIR)
+        self.source_directory = directory
+        self.widths = sorted(widths)
+        self.quality = quality
+        self.max_pixels = max_pixels
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Stems of undecodable sources; content-addressed, so never retried
+        self._broken: Set[str] = set()
+        # stem -> displayed width of the source; content-addressed, so only
+        # dropped when the source is discarded
+        self._widths: Dict[str, int] = {}
+        # Called for every image in every serialized test, so memoized; a
+        # pure function of (stem, width)
+        self._memoized_srcsets = lru_cache(maxsize=16384)(self._srcsets)
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def _stem(url: Optional[str]) -> Optional[str]:
+        if not url or not url.startswith("/uploads/"):
+            return None
+        stem, ext = os.path.splitext(url[len("/uploads/") :])
+        if ext.lower() not in SOURCE_EXTENSIONS or not re.fullmatch(r"[\w-]+", stem):
+            return None
+        return stem
+
+    def is_source(self, url: Optional[str]) -> bool:
+        """Whether ``url`` is an uploaded image that gets variants."""
+        return self._stem(url) is not None
+
+    def srcsets(self, url: Optional[str]) -> Optional[dict]:
+        """
+        ``{"webp": srcset, "jpeg": srcset, "src": url}`` for an uploaded image.
+
+        Non-blocking. None for sources that are broken, or not measured yet;
+        the latter are scheduled for generation.
+        """
+        stem = self._stem(url)
+        if stem is None or stem in self._broken:
+            return None
+        source_width = self._widths.get(stem)
+        if source_width is None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return None
+            self._generate_soon(stem)
+            return None
+        # A copy: the memoized dict is shared by every caller
+        return dict(self._memoized_srcsets(stem, source_width))
+
+    def _srcsets(self, stem: str, source_width: int) -> dict:
+        # (variant width, real width of that file); variants that would all
+        # be the same recompressed original are listed once
+        variants, seen = [], set()
+        for width in self.widths:
+            real = min(width, source_width)
+            if real not in seen:
+                seen.add(real)
+                variants.append((width, real))
+
+        def srcset(ext):
+            return ", ".join(
+                f"/uploads/{VARIANT_DIR}/{stem}-{width}.{ext} {real}w"
+                for width, real in variants
+            )
+
+        return {
+            "webp": srcset("webp"),
+            "jpeg": srcset("jpg"),
+            "src": f"/uploads/{VARIANT_DIR}/{stem}-{variants[-1][0]}.jpg",
+        }
+
+    def _source_path(self, stem: str) -> Optional[str]:
+        for ext in SOURCE_EXTENSIONS:
+            path = os.path.join(self.source_directory, stem + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _open(self, path: str) -> Image.Image:
+        """Open a source image (header only), rejecting oversized ones."""
+        image = Image.open(path)
+        if image.width * image.height > self.max_pixels:
+            image.close()
+            raise Image.DecompressionBombError(f"{path} exceeds {self.max_pixels} px")
+        return image
+
+    def _width_path(self, stem: str) -> str:
+        return os.path.join(self.directory, stem + WIDTH_SUFFIX)
+
+    def _record_width(self, stem: str, width: int):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(str(width))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self._width_path(stem))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._widths[stem] = width
+
+    def load(self):
+        """Read the source widths recorded so far. Blocking; run at startup."""
+        for entry in os.scandir(self.directory):
+            stem, ext = os.path.splitext(entry.name)
+            if ext == WIDTH_SUFFIX:
+                try:
+                    with open(entry.path) as f:
+                        self._widths[stem] = int(f.read())
+                except (OSError, ValueError):
+                    pass
+
+    @staticmethod
+    def _displayed_width(opened: Image.Image) -> int:
+        orientation = opened.getexif().get(ExifTags.Base.Orientation)
+        if orientation in TRANSPOSED_ORIENTATIONS:
+            return opened.height
+        return opened.width
+
+    def measure(self, stem: str) -> Optional[int]:
+        """Width of the source as displayed (after EXIF rotation). Blocking."""
+        if stem in self._widths:
+            return self._widths[stem]
+        if stem in self._broken:
+            return None
+        # Recorded by another worker
+        try:
+            with open(self._width_path(stem)) as f:
+                self._widths[stem] = int(f.read())
+                return self._widths[stem]
+        except (OSError, ValueError):
+            pass
+        source = self._source_path(stem)
+        if source is None:
+            return None
+        try:
+            with self._open(source) as opened:
+                width = self._displayed_width(opened)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            self._broken.add(stem)
+            return None
+        self._record_width(stem, width)
+        return width
+
+    def discard(self, stem: str):
+        """Forget a deleted source and remove its variants. Blocking."""
+        self._widths.pop(stem, None)
+        self._broken.discard(stem)
+        names = [stem + WIDTH_SUFFIX] + [
+            f"{stem}-{width}.{ext}" for width in self.widths for ext in FORMATS
+        ]
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _save(self, image: Image.Image, name: str, ext: str):
+        pillow_format, options = FORMATS[ext]
+        if pillow_format == "JPEG" and image.mode != "RGB":
+            # Flatten transparency onto white
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, pillow_format, quality=self.quality, **options)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, os.path.join(self.directory, name))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def generate(self, stem: str) -> bool:
+        """Write all missing variants of ``/uploads/<stem>.*``. Blocking."""
+        missing = [
+            (width, ext)
+            for width in self.widths
+            for ext in FORMATS
+            if not os.path.exists(os.path.join(self.directory, f"{stem}-{width}.{ext}"))
+        ]
+        if not missing:
+            return self.measure(stem) is not None
+        if stem in self._broken:
+            return False
+        source = self._source_path(stem)
+        if source is None:
+            return False
+
+        try:
+            with self._open(source) as opened:
+                width = self._displayed_width(opened)
+                # JPEG: let the decoder downscale by up to 8x first
+                opened.draft("RGB", (self.widths[-1], self.widths[-1]))
+                image = ImageOps.exif_transpose(opened)
+                has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+                image = image.convert("RGBA" if has_alpha else "RGB")
+        except (OSError, ValueError, Image.DecompressionBombError):
+            # Truncated, undecodable or oversized upload: serve the original
+            # only, and do not try again on every request
+            self._broken.add(stem)
+            return False
+        self._record_width(stem, width)
+
+        # Widest first, each step resized from the previous one
+        for width in reversed(self.widths):
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.Resampling.LANCZOS)
+            for ext in FORMATS:
+                if (width, ext) in missing:
+                    self._save(image, f"{stem}-{width}.{ext}", ext)
+        return True
+
+    async def ensure(self, name: str) -> bool:
+        """
+        Make sure the variant file ``name`` exists, generating it if needed.
+
+        Concurrent requests for variants of the same image share one
+        generation. Returns False for unknown widths or missing sources.
+        """
+        match = VARIANT_NAME.match(name)
+        if match is None or int(match["width"]) not in self.widths:
+            return False
+        if os.path.exists(os.path.join(self.directory, name)):
+            return True
+
+        stem = match["stem"]
+        if stem in self._broken:
+            return False
+        return await asyncio.shield(self._generate_soon(stem))
+
+    def _generate_soon(self, stem: str) -> asyncio.Future:
+        """Generate in the threadpool, once for concurrent callers."""
+        pending = self._pending.get(stem)
+        if pending is None:
+            pending = asyncio.ensure_future(run_in_threadpool(self.generate, stem))
+            self._pending[stem] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(stem, None))
+        return pending
+
+
+image_variants = ImageVariants(
+    settings.UPLOAD_DIR,
+    settings.IMAGE_VARIANT_WIDTHS,
+    settings.IMAGE_VARIANT_QUALITY,
+    settings.UPLOAD_MAX_PIXELS,
+)
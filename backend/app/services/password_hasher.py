@@ -0,0 +1,65 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import settings
+
+
+class PasswordHasher:
+    """
+    Bounded thread pool for bcrypt hashing and verification.
+
+    A bcrypt call takes hundreds of milliseconds of CPU; bcrypt releases the
+    GIL, so running it in threads keeps the event loop serving exam traffic.
+    At most ``workers + max_queue`` logins are admitted at a time; beyond
+    that logins are rejected with 503 instead of queueing up. Hashing for
+    admin operations waits for a free slot instead.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._login_slots = asyncio.Semaphore(workers + max_queue)
+
+    def _run(self, fn: Callable, *args) -> "asyncio.Future[Any]":
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.get_password_hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a login password.
+
+        Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored
+        hash was made with another cost than BCRYPT_ROUNDS and should be
+        saved in its place.
+        """
+        if self._login_slots.locked():
+            raise HTTPException(
+                status_code=503,
+                detail="Too many logins at once, please try again",
+                headers={"Retry-After": "1"},
+            )
+        async with self._login_slots:
+            return await self._run(
+                security.verify_and_update_password, password, hashed_password
+            )
+
+
+password_hasher = PasswordHasher(settings.BCRYPT_WORKERS, settings.LOGIN_MAX_QUEUE)
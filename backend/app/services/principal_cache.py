@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import NamedTuple, Optional, Union
+
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """The authenticated admin/teacher: only what authorization needs."""
+
+    id: int
+    username: str
+    role: str
+
+
+@dataclass(frozen=True)
+class StudentPrincipal:
+    """The authenticated student. The face encoding is not part of it."""
+
+    id: int
+    student_id: str
+    full_name: str
+    group_id: str
+
+
+Principal = Union[UserPrincipal, StudentPrincipal]
+
+
+class CachedPrincipal(NamedTuple):
+    sub: str
+    principal: Principal
+    expires_at: float  # time.time(), never past the token's own exp
+
+
+class PrincipalCache:
+    """
+    Token -> resolved principal, so repeated requests with the same bearer
+    token skip both the JWT decode and the users/students lookup.
+
+    Entries live at most ``ttl`` seconds and never outlive the token.
+    Students are never edited or deleted, so only users are invalidated.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedPrincipal]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[CachedPrincipal]:
+        entry = self._entries.get(token)
+        if entry is None:
+            CACHE_LOOKUPS.inc("principal", "miss")
+            return None
+        if entry.expires_at < time.time():
+            del self._entries[token]
+            CACHE_LOOKUPS.inc("principal", "miss")
+            return None
+        self._entries.move_to_end(token)
+        CACHE_LOOKUPS.inc("principal", "hit")
+        return entry
+
+    def set(
+        self, token: str, sub: str, principal: Principal, token_exp: Optional[float]
+    ):
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        self._entries[token] = CachedPrincipal(sub, principal, expires_at)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, sub: str):
+        """Drop every cached token of subject ``sub`` (a username or student:ID)."""
+        for token in [t for t, e in self._entries.items() if e.sub == sub]:
+            del self._entries[token]
+
+    def clear(self):
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_TTL, settings.PRINCIPAL_CACHE_MAX_ENTRIES
+)
+
+
+def invalidate_user(username: str):
+    """
+    Forget a renamed or deleted user's tokens in this worker. Other workers
+    keep serving the old principal for up to ``PRINCIPAL_CACHE_TTL`` seconds.
+    """
+    principal_cache.invalidate(username)
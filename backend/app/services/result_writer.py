@@ -0,0 +1,194 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import BinaryIO, List, Optional
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.analytics import insert_results
+
+logger = logging.getLogger(__name__)
+
+
+def _open_locked(path: str, mode: str) -> Optional[BinaryIO]:
+    """Open ``path`` holding an exclusive lock, or return None if it is taken."""
+    f = open(path, mode)
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+class ResultWriter:
+    """
+    Write-behind queue for test results.
+
+    ``submit`` appends the result to a local spool file (the durable
+    acknowledgement) and queues it in memory; a background task inserts
+    queued results in multi-row batches once ``batch_size`` is reached or
+    every ``flush_interval`` seconds. A spool segment is deleted only after
+    its rows are committed, and leftover segments are replayed on startup.
+    Rows carry a ``submission_id`` so a replay never inserts a result twice.
+
+    Spool files are flock'ed by the worker that owns them, so several
+    workers can share one spool directory.
+    """
+
+    def __init__(
+        self, spool_dir: str, batch_size: int, flush_interval: float, fsync: bool
+    ):
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self._pending: List[dict] = []
+        # Spool files whose rows are pending; the last one is being appended to
+        self._segments: List[BinaryIO] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def _new_segment(self) -> BinaryIO:
+        # Never reuse a name: a restarted worker can get the same pid, and
+        # appending to a leftover segment would delete its un-replayed rows
+        # on the next flush
+        while True:
+            path = os.path.join(
+                self.spool_dir, f"results-{os.getpid()}-{uuid.uuid4().hex}.ndjson"
+            )
+            try:
+                segment = _open_locked(path, "xb")
+            except FileExistsError:
+                continue
+            if segment is not None:
+                return segment
+            # Another worker's replay locked the empty file before we did
+            # and is about to remove it
+
+    async def start(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        await self._replay()
+        self._segments = [self._new_segment()]
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing results on shutdown: {e}")
+        for segment in self._segments:
+            # Segments with unflushed rows are kept and replayed on startup
+            if not self._pending:
+                os.remove(segment.name)
+            segment.close()
+        self._segments = []
+
+    def submit(self, row: dict):
+        """Durably queue one result row (see analytics.new_result_row)."""
+        # Append and enqueue without awaiting in between, so every row in
+        # _pending is in one of the current _segments
+        spool = self._segments[-1]
+        record = {**row, "taken_at": row["taken_at"].isoformat()}
+        spool.write(json.dumps(record).encode() + b"\n")
+        spool.flush()
+        if self.fsync:
+            os.fsync(spool.fileno())
+        self._pending.append(row)
+
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Rows stay pending and spooled; retry on the next tick
+                logger.error(f"Error flushing results: {e}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            segments = self._segments
+            # New submissions go to a fresh segment while this batch commits
+            self._segments = [self._new_segment()]
+            try:
+                await self._insert(batch)
+            except Exception:
+                self._pending = batch + self._pending
+                self._segments = segments + self._segments
+                raise
+
+            for segment in segments:
+                os.remove(segment.name)
+                segment.close()
+
+    async def _insert(self, rows: List[dict]):
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(rows), self.batch_size):
+                await insert_results(db, rows[start : start + self.batch_size])
+            await db.commit()
+
+    async def _replay(self):
+        """Insert rows left in spool files by a previous (crashed) process."""
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "*.ndjson"))):
+            f = _open_locked(path, "rb")
+            if f is None:
+                continue  # Still owned by a running worker
+            with f:
+                rows = []
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                        row["taken_at"] = datetime.fromisoformat(row["taken_at"])
+                        rows.append(row)
+                    except (ValueError, KeyError):
+                        # Torn last line from a crash mid-write; it was never acknowledged
+                        logger.warning(f"Skipping malformed spool line in {path}")
+                try:
+                    if rows:
+                        await self._insert(rows)
+                except Exception as e:
+                    logger.error(f"Error replaying {path}, keeping it: {e}")
+                    continue
+                os.remove(path)
+            logger.info(f"Replayed {len(rows)} spooled results from {path}")
+
+
+result_writer = ResultWriter(
+    settings.RESULT_SPOOL_DIR,
+    settings.RESULT_BATCH_SIZE,
+    settings.RESULT_FLUSH_INTERVAL,
+    settings.RESULT_SPOOL_FSYNC,
+)
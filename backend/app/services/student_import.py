@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+import os
+import zipfile
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+REQUIRED_FIELDS = ("full_name", "student_id", "group_id")
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def parse_manifest(filename: str, data: bytes) -> List[dict]:
+    """
+    Parse a bulk-enrollment manifest.
+
+    Accepts CSV with a header row or a JSON list of objects. Every row needs
+    ``full_name``, ``student_id`` and ``group_id``; an optional ``photo``
+    column names the image file, otherwise ``<student_id>.jpg|.jpeg|.png``
+    is used.
+    """
+    text = data.decode("utf-8-sig")
+    is_json = (filename or "").lower().endswith(".json") or text.lstrip()[:1] in "[{"
+
+    try:
+        if is_json:
+            rows = json.loads(text)
+            if isinstance(rows, dict):
+                rows = rows.get("students", [])
+        else:
+            rows = list(csv.DictReader(io.StringIO(text)))
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid manifest: {e}")
+
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        raise HTTPException(status_code=400, detail="Manifest must be a list of rows")
+
+    return [
+        {
+            key.strip(): "" if value is None else str(value).strip()
+            for key, value in row.items()
+            if key
+        }
+        for row in rows
+    ]
+
+
+class PhotoSource:
+    """
+    Looks up photos by file name in a ZIP archive and/or uploaded files.
+
+    Takes ownership of ``archive_file`` and the ``files`` (spooled uploads)
+    and closes them in ``close()``. Raises ``zipfile.BadZipFile`` if the
+    archive is not a valid ZIP.
+    """
+
+    def __init__(self, archive_file: Optional[BinaryIO], files: Dict[str, BinaryIO]):
+        self._archive_file = archive_file
+        self._files = list(files.values())
+        self._archive = None
+        self._loaders: Dict[str, Callable[[], bytes]] = {}
+
+        if archive_file is not None:
+            try:
+                archive = self._archive = zipfile.ZipFile(archive_file)
+            except zipfile.BadZipFile:
+                self.close()
+                raise
+            for info in archive.infolist():
+                if not info.is_dir():
+                    name = os.path.basename(info.filename).lower()
+                    self._loaders[name] = lambda info=info: archive.read(info)
+
+        for name, file in files.items():
+            file.flush()  # read back through the descriptor
+            self._loaders[os.path.basename(name).lower()] = lambda f=file: _read_all(f)
+
+    def find(self, row: dict) -> Optional[str]:
+        """Return the lookup key for the row's photo, if there is one."""
+        if row.get("photo"):
+            name = os.path.basename(row["photo"]).lower()
+            return name if name in self._loaders else None
+        for ext in PHOTO_EXTENSIONS:
+            name = f"{row['student_id']}{ext}".lower()
+            if name in self._loaders:
+                return name
+        return None
+
+    def read(self, key: str) -> bytes:
+        """
+        Read one photo. Blocking (ZIP members are decompressed here), so call
+        it from a worker thread.
+        """
+        # Photos are read lazily so the whole batch is never in memory
+        return self._loaders[key]()
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+        if self._archive_file is not None:
+            self._archive_file.close()
+        for file in self._files:
+            file.close()
+
+
+def _read_all(file: BinaryIO) -> bytes:
+    # os.pread: no shared file position, so concurrent reads are safe
+    return os.pread(file.fileno(), os.fstat(file.fileno()).st_size, 0)
+
+
+def validate_rows(rows: List[dict], photos: PhotoSource):
+    """
+    Split manifest rows into importable rows and per-row errors.
+
+    Returns ``(valid, errors)`` where ``valid`` is a list of
+    ``(row_number, row, photo_key)`` and ``errors`` a list of
+    ``(row_number, student_id, detail)``.
+    """
+    valid, errors = [], []
+    seen = set()
+    for number, row in enumerate(rows, start=1):
+        missing = [f for f in REQUIRED_FIELDS if not row.get(f)]
+        if missing:
+            errors.append(
+                (number, row.get("student_id"), f"Missing {', '.join(missing)}")
+            )
+            continue
+        if row["student_id"] in seen:
+            errors.append(
+                (number, row["student_id"], "Duplicate student ID in manifest")
+            )
+            continue
+        seen.add(row["student_id"])
+
+        photo_key = photos.find(row)
+        if photo_key is None:
+            errors.append((number, row["student_id"], "Photo not found"))
+            continue
+        valid.append((number, row, photo_key))
+    return valid, errors
@@ -0,0 +1,117 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS
+
+
+class CachedPayload(NamedTuple):
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+class PayloadCache:
+    """
+    LRU cache of serialized JSON response bodies, bounded by total bytes.
+
+    Entries also expire after ``ttl`` seconds so that workers which did not
+    see an invalidation (other processes) converge quickly.
+
+    Every invalidation bumps ``generation``. A payload built from a query
+    that started before an invalidation may already be stale, so ``set``
+    with the generation read before the query does not store it.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, CachedPayload]" = OrderedDict()
+        self._size = 0
+
+    def get(self, key: Hashable) -> Optional[CachedPayload]:
+        entry = self._entries.get(key)
+        if entry is None:
+            CACHE_LOOKUPS.inc("test_payload", "miss")
+            return None
+        if entry.expires_at < time.monotonic():
+            self._pop(key)
+            CACHE_LOOKUPS.inc("test_payload", "miss")
+            return None
+        self._entries.move_to_end(key)
+        CACHE_LOOKUPS.inc("test_payload", "hit")
+        return entry
+
+    def set(
+        self, key: Hashable, body: bytes, generation: Optional[int] = None
+    ) -> CachedPayload:
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        entry = CachedPayload(body, etag, time.monotonic() + self.ttl)
+        if len(body) > self.max_bytes or (
+            generation is not None and generation != self.generation
+        ):
+            # Too big, or invalidated while it was being built: not cached,
+            # still hand back an ETag for the response
+            return entry
+
+        self._pop(key)
+        self._entries[key] = entry
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._pop(oldest)
+        return entry
+
+    def _pop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry.body)
+
+    def invalidate(self, *keys: Hashable):
+        self.generation += 1
+        for key in keys:
+            self._pop(key)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._size = 0
+
+
+def payload_response(request: Request, payload: CachedPayload) -> Response:
+    """JSON response for a cached payload, or 304 if the client already has it."""
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if payload.etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(
+        content=payload.body, media_type="application/json", headers=headers
+    )
+
+
+# Keys: ("test", test_id, version) for a single test, ("list",) for the full
+# listing
+test_cache = PayloadCache(settings.TEST_CACHE_MAX_BYTES, settings.TEST_CACHE_TTL)
+
+
+def invalidate_test(test_id: Optional[int] = None):
+    """
+    Drop cached payloads affected by a change to ``test_id``.
+
+    Only this worker's cache is reached. Single tests are keyed on their
+    version, so other workers pick up an edit on the next request; their
+    listing payload catches up within ``TEST_CACHE_TTL``.
+    """
+    test_cache.invalidate(("list",))
+
+
+def invalidate_all_tests():
+    """Drop every cached payload, e.g. after a subject they embed changed."""
+    test_cache.clear()
@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+import posixpath
+import re
+import zipfile
+from typing import Dict, List, Tuple
+
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+
+from app.schemas import test as test_schema
+from app.services.upload_store import StoredUpload, upload_store
+
+MANIFEST_NAMES = ("tests.json", "tests.csv")
+
+tests_create_adapter = TypeAdapter(List[test_schema.TestCreate])
+
+
+def _parse_json(text: str) -> list:
+    data = json.loads(text)
+    if isinstance(data, dict):
+        # Either {"tests": [...]} or a single test object
+        data = data.get("tests", [data])
+    return data
+
+
+def _parse_csv(text: str) -> list:
+    """
+    One row per question. Columns: title, description, subject_id, text,
+    image, correct_option and option_1..option_N. Consecutive rows with the
+    same title/description/subject_id form one test.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    option_columns = sorted(
+        (c for c in reader.fieldnames or [] if re.fullmatch(r"option_\d+", c)),
+        key=lambda c: int(c.split("_")[1]),
+    )
+
+    tests, current_key = [], None
+    for row in reader:
+        key = (row.get("title"), row.get("description"), row.get("subject_id"))
+        if key != current_key:
+            current_key = key
+            tests.append(
+                {
+                    "title": row.get("title"),
+                    "description": row.get("description") or None,
+                    "subject_id": row.get("subject_id") or None,
+                    "questions": [],
+                }
+            )
+        tests[-1]["questions"].append(
+            {
+                "text": row.get("text"),
+                "image": row.get("image") or None,
+                "options": [row[c] for c in option_columns if row.get(c)],
+                "correct_option": row.get("correct_option"),
+            }
+        )
+    return tests
+
+
+def parse_tests(filename: str, data: bytes) -> List[test_schema.TestCreate]:
+    """Parse a JSON or CSV test bank into validated TestCreate objects."""
+    text = data.decode("utf-8-sig")
+    try:
+        if (filename or "").lower().endswith(".csv"):
+            raw = _parse_csv(text)
+        else:
+            raw = _parse_json(text)
+        return tests_create_adapter.validate_python(raw)
+    except (ValueError, csv.Error) as e:
+        # Covers pydantic's ValidationError, which is a ValueError too
+        raise HTTPException(status_code=400, detail=f"Invalid test file: {e}")
+
+
+def parse_archive(
+    data: bytes,
+) -> Tuple[List[test_schema.TestCreate], List[StoredUpload]]:
+    """
+    Parse a ZIP containing tests.json or tests.csv plus the images it uses.
+
+    Image references (question ``image`` and option ``image``) that point to
+    files inside the archive are stored in the upload store and rewritten
+    to their ``/uploads/...`` URL. Also returns the stored images, for
+    ``upload_store.discard`` if the tests are not saved after all.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Archive is not a valid ZIP")
+
+    with archive:
+        members = {
+            posixpath.normpath(info.filename): info
+            for info in archive.infolist()
+            if not info.is_dir()
+        }
+        manifest = next(
+            (name for name in members if posixpath.basename(name) in MANIFEST_NAMES),
+            None,
+        )
+        if manifest is None:
+            raise HTTPException(
+                status_code=400, detail="Archive must contain tests.json or tests.csv"
+            )
+
+        tests = parse_tests(manifest, archive.read(members[manifest]))
+        base = posixpath.dirname(manifest)
+        saved: Dict[str, StoredUpload] = {}
+
+        def resolve(ref):
+            if not ref:
+                return ref
+            name = posixpath.normpath(posixpath.join(base, ref))
+            if name not in members:
+                return ref
+            if name not in saved:
+                # Same size/type limits as /upload/, stored by content hash
+                saved[name] = upload_store.save_bytes(archive.read(members[name]))
+            return saved[name].url
+
+        try:
+            for test in tests:
+                for question in test.questions:
+                    question.image = resolve(question.image)
+                    for option in question.options:
+                        if isinstance(option, dict) and option.get("image"):
+                            option["image"] = resolve(option["image"])
+        except BaseException:
+            upload_store.discard(saved.values())
+            raise
+    return tests, list(saved.values())
@@ -0,0 +1,276 @@
+import hashlib
+import os
+import tempfile
+from typing import Iterable, List, NamedTuple, Optional
+
+from fastapi import HTTPException, Request
+from PIL import Image
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.image_variants import image_variants
+
+# Leading bytes -> (content type, extension). The type is taken from the
+# content, never from the client's filename or Content-Type header.
+SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+]
+SNIFF_BYTES = 12
+# Allowance for multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class StoredUpload(NamedTuple):
+    url: str
+    sha256: str
+    size: int
+    content_type: str
+    created: bool  # False if identical content was already stored
+
+
+def sniff_type(head: bytes) -> Optional[tuple]:
+    for signature, content_type, extension in SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+class _PendingUpload:
+    """A file being received: spooled to a temp file and hashed chunk by chunk."""
+
+    def __init__(self, store: "UploadStore"):
+        self.store = store
+        fd, self.path = tempfile.mkstemp(dir=store.directory, suffix=".part")
+        self.file = os.fdopen(fd, "wb")
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.kind = None
+
+    def _check(self, data: bytes, final: bool = False):
+        self.size += len(data)
+        if self.size > self.store.max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File is larger than {self.store.max_bytes} bytes",
+            )
+        if self.kind is None:
+            self.head += data[: SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES or final:
+                self.kind = self.store.check_type(self.head)
+        self.sha256.update(data)
+
+    async def write(self, data: bytes):
+        self._check(data)
+        await run_in_threadpool(self.file.write, data)
+
+    async def finish(self) -> StoredUpload:
+        if self.kind is None:
+            self._check(b"", final=True)
+        await run_in_threadpool(self.file.close)
+        return await run_in_threadpool(self.store._publish, self)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class UploadStore:
+    """
+    Content-addressed image storage in the uploads directory.
+
+    Files are named ``<sha256><ext>``, so identical content is stored (and
+    cached by clients) once, and a stored file never changes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        allowed_types: List[str],
+        max_pixels: int,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.allowed_types = set(allowed_types)
+        self.max_pixels = max_pixels
+        os.makedirs(directory, exist_ok=True)
+
+    def check_type(self, head: bytes) -> tuple:
+        kind = sniff_type(head)
+        if kind is None or kind[0] not in self.allowed_types:
+            raise HTTPException(
+                status_code=415,
+                detail="Unsupported file type, allowed: "
+                + ", ".join(sorted(self.allowed_types)),
+            )
+        return kind
+
+    def _check_pixels(self, path: str):
+        """Reject images too large to decode safely; reads the header only."""
+        try:
+            with Image.open(path) as image:
+                pixels = image.width * image.height
+        except Image.DecompressionBombError:
+            pixels = None
+        except (OSError, ValueError):
+            raise HTTPException(status_code=400, detail="File is not a valid image")
+        if pixels is None or pixels > self.max_pixels:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image is larger than {self.max_pixels} pixels",
+            )
+
+    def _publish(self, pending: _PendingUpload) -> StoredUpload:
+        self._check_pixels(pending.path)
+        content_type, extension = pending.kind
+        digest = pending.sha256.hexdigest()
+        name = f"{digest}{extension}"
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            os.remove(pending.path)
+            created = False
+        else:
+            os.chmod(pending.path, 0o644)
+            # Atomic: a concurrent upload of the same content just replaces
+            # the file with identical bytes
+            os.replace(pending.path, path)
+            created = True
+        return StoredUpload(
+            f"/uploads/{name}", digest, pending.size, content_type, created
+        )
+
+    def save_bytes(self, data: bytes) -> StoredUpload:
+        """Store an in-memory file (e.g. from an archive). Blocking."""
+        pending = _PendingUpload(self)
+        try:
+            pending._check(data, final=True)
+            pending.file.write(data)
+            pending.file.close()
+            return self._publish(pending)
+        finally:
+            pending.abort()
+
+    def discard(self, uploads: Iterable[StoredUpload]):
+        """
+        Remove files this process created, e.g. when an import fails, with
+        their resized variants. Blocking.
+        """
+        for upload in uploads:
+            if upload.created:
+                name = os.path.basename(upload.url)
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+                image_variants.discard(upload.sha256)
+
+    async def save_multipart(
+        self, request: Request, field: str = "file"
+    ) -> StoredUpload:
+        """
+        Stream the ``field`` file of a multipart request into the store.
+
+        The body is parsed as it arrives; the file is hashed and written in
+        chunks and limits are enforced before anything is buffered, instead
+        of letting the framework spool the whole form first.
+        """
+        content_length = int(request.headers.get("content-length") or 0)
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            raise HTTPException(
+                status_code=413, detail=f"File is larger than {self.max_bytes} bytes"
+            )
+        content_type, params = parse_options_header(
+            request.headers.get("content-type", "")
+        )
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+        # Parser callbacks are synchronous; queue their events and handle
+        # them (with awaits) after each chunk
+        events = []
+        header = {"field": b"", "value": b""}
+        headers = {}
+
+        def on_header_field(data, start, end):
+            header["field"] += data[start:end]
+
+        def on_header_value(data, start, end):
+            header["value"] += data[start:end]
+
+        def on_header_end():
+            headers[header["field"].lower()] = header["value"]
+            header["field"], header["value"] = b"", b""
+
+        def on_headers_finished():
+            _, disposition = parse_options_header(
+                headers.get(b"content-disposition", b"")
+            )
+            events.append(("part", disposition))
+            headers.clear()
+
+        def on_part_data(data, start, end):
+            events.append(("data", data[start:end]))
+
+        def on_part_end():
+            events.append(("end", None))
+
+        parser = MultipartParser(
+            boundary,
+            {
+                "on_header_field": on_header_field,
+                "on_header_value": on_header_value,
+                "on_header_end": on_header_end,
+                "on_headers_finished": on_headers_finished,
+                "on_part_data": on_part_data,
+                "on_part_end": on_part_end,
+            },
+        )
+
+        pending, stored = None, None
+        receiving = False
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                for kind, value in events:
+                    if kind == "part":
+                        receiving = (
+                            stored is None
+                            and value.get(b"name", b"").decode() == field
+                            and b"filename" in value
+                        )
+                        if receiving:
+                            pending = _PendingUpload(self)
+                    elif kind == "data" and receiving:
+                        await pending.write(value)
+                    elif kind == "end" and receiving:
+                        stored = await pending.finish()
+                        pending, receiving = None, False
+                events.clear()
+            parser.finalize()
+        finally:
+            if pending is not None:
+                pending.abort()
+
+        if stored is None:
+            raise HTTPException(
+                status_code=400, detail=f"No '{field}' file in the form"
+            )
+        return stored
+
+
+upload_store = UploadStore(
+    settings.UPLOAD_DIR,
+    settings.UPLOAD_MAX_BYTES,
+    settings.UPLOAD_ALLOWED_TYPES,
+    settings.UPLOAD_MAX_PIXELS,
+)
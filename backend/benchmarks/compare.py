@@ -0,0 +1,44 @@
+"""
+Compare two load test reports (benchmarks.loadtest --output).
+
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import argparse
+import json
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["endpoints"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["endpoints"]
+
+    print(
+        f"{'endpoint':24} {'metric':15} {'baseline':>10} {'candidate':>10} {'change':>9}"
+    )
+    for name in sorted(set(baseline) | set(candidate)):
+        if name not in baseline or name not in candidate:
+            print(
+                f"{name:24} only in {'candidate' if name in candidate else 'baseline'}"
+            )
+            continue
+        for metric in METRICS + ("errors",):
+            before, after = baseline[name][metric], candidate[name][metric]
+            print(
+                f"{name:24} {metric:15} {before:>10} {after:>10} "
+                f"{change(before, after):>9}"
+            )
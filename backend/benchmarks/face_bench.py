@@ -0,0 +1,189 @@
+"""
+Microbenchmarks for the face pipeline: decode, detection, encoding and
+1:1 / 1:N comparison.
+
+    python -m benchmarks.face_bench --image face.jpg --output face.json
+
+Runs offline. Without --image a synthetic photo is generated; detection then
+finds no face (its cost barely depends on the content) and encoding uses a
+centered face box. Each case reports mean/min/p95 time and peak traced
+memory (Python and NumPy allocations; dlib's own buffers are not traced,
+see rss_growth_kib for those).
+"""
+
+import argparse
+import io
+import json
+import resource
+import time
+import tracemalloc
+
+import face_recognition
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.face_index import FaceIndex
+from app.services.face_service import FaceService, decode_image
+
+RESOLUTIONS = ((640, 480), (1920, 1080), (4000, 3000))
+GALLERY_SIZES = (1000, 10000, 100000)
+
+
+def synthetic_jpeg(width: int, height: int) -> bytes:
+    """Smooth gradients plus noise: compresses roughly like a camera photo."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack(
+        [x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)],
+        axis=-1,
+    )
+    noise = rng.integers(-20, 20, base.shape)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _max_rss_kib() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm-up: model loading, caches
+    rss_before = _max_rss_kib()
+    tracemalloc.start()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times = np.asarray(times)
+    return {
+        "mean_ms": round(float(times.mean()), 3),
+        "min_ms": round(float(times.min()), 3),
+        "p95_ms": round(float(np.percentile(times, 95)), 3),
+        "peak_kib": peak // 1024,
+        "rss_growth_kib": _max_rss_kib() - rss_before,
+    }
+
+
+# Cases are collected before they run, so the lambdas bind loop values
+# through default arguments
+
+
+def bench_decode(images):
+    for name, data in images:
+        yield f"decode full {name}", lambda data=data: np.asarray(
+            Image.open(io.BytesIO(data)).convert("RGB")
+        )
+        yield f"decode max_edge={settings.FACE_DETECT_MAX_EDGE} {name}", (
+            lambda data=data: decode_image(data, settings.FACE_DETECT_MAX_EDGE)
+        )
+
+
+def bench_detect(image, models, upsamples):
+    for model in models:
+        for upsample in upsamples:
+            yield f"detect {model} upsample={upsample}", lambda model=model, upsample=upsample: (
+                face_recognition.face_locations(
+                    image, number_of_times_to_upsample=upsample, model=model
+                )
+            )
+
+
+def bench_encode(image, location, jitters):
+    for num_jitters in jitters:
+        yield f"encode num_jitters={num_jitters}", lambda num_jitters=num_jitters: (
+            face_recognition.face_encodings(
+                image, known_face_locations=[location], num_jitters=num_jitters
+            )
+        )
+
+
+def bench_compare(encoding, gallery_sizes):
+    rng = np.random.default_rng(1)
+    probe = np.asarray(encoding, dtype=np.float64)
+    yield "compare 1:1 verify_face", lambda: FaceService.verify_face(probe, probe)
+    for size in gallery_sizes:
+        gallery = rng.normal(0, 0.1, (size, 128)).astype(np.float32)
+        index = FaceIndex()
+        index.replace(np.arange(size), gallery)
+        as_list = list(gallery)
+        yield f"compare 1:N FaceIndex n={size}", lambda index=index: (
+            index.identify(probe)
+        )
+        yield f"compare 1:N face_distance n={size}", lambda as_list=as_list: (
+            face_recognition.face_distance(as_list, probe)
+        )
+
+
+def run(args) -> dict:
+    if args.image:
+        with open(args.image, "rb") as f:
+            photo = f.read()
+        images = [("photo", photo)]
+    else:
+        images = [(f"{w}x{h}", synthetic_jpeg(w, h)) for w, h in RESOLUTIONS]
+        photo = images[1][1]
+
+    image = decode_image(photo, settings.FACE_DETECT_MAX_EDGE)
+    locations = face_recognition.face_locations(image)
+    if len(locations) == 1:
+        location = locations[0]
+    else:
+        # No (single) face: encode a centered box of a typical face size
+        height, width = image.shape[:2]
+        size = min(height, width) // 2
+        top, left = (height - size) // 2, (width - size) // 2
+        location = (top, left + size, top + size, left)
+    encoding = face_recognition.face_encodings(image, known_face_locations=[location])[
+        0
+    ]
+
+    models = ["hog", "cnn"] if args.cnn else ["hog"]
+    cases = [
+        *bench_decode(images),
+        *bench_detect(image, models, args.upsample),
+        *bench_encode(image, location, args.jitters),
+        *bench_compare(encoding, args.gallery),
+    ]
+
+    results = {}
+    for name, fn in cases:
+        repeat = max(1, args.repeat // 5) if "cnn" in name else args.repeat
+        results[name] = measure(fn, repeat)
+        r = results[name]
+        print(
+            f"{name:45} {r['mean_ms']:>10.3f} {r['min_ms']:>10.3f} "
+            f"{r['p95_ms']:>10.3f} {r['peak_kib']:>10} {r['rss_growth_kib']:>10}"
+        )
+    return {
+        "image": args.image or "synthetic",
+        "face_found": len(locations) == 1,
+        "detect_shape": list(image.shape),
+        "cases": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Face pipeline microbenchmarks")
+    parser.add_argument("--image", help="photo with one face (default: synthetic)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--cnn", action="store_true", help="also time the CNN model")
+    parser.add_argument("--upsample", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--jitters", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--gallery", type=int, nargs="+", default=list(GALLERY_SIZES))
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    print(
+        f"{'case':45} {'mean ms':>10} {'min ms':>10} {'p95 ms':>10} "
+        f"{'peak KiB':>10} {'rss +KiB':>10}"
+    )
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
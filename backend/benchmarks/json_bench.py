@@ -0,0 +1,184 @@
+"""
+Serialization and compression cost of the large JSON responses.
+
+    python -m benchmarks.json_bench --questions 200 --results 1000 --output json.json
+
+Runs offline on synthetic data shaped like production rows:
+
+- a test with --questions questions (HTML text, four options with images), as
+  built by get_test/read_tests on a payload cache miss;
+- a page of --results result rows, as returned by get_all_results.
+
+For each, the stock FastAPI route (response_model validation, or
+jsonable_encoder + json.dumps) is timed against the FAST_JSON path, and the
+serialized body is compressed with gzip and (if installed) brotli at the
+COMPRESSION_* settings. Reported times are per request.
+"""
+
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.compression import brotli
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, orjson
+from app.schemas import test as test_schema
+
+TEXT = "<p>" + "Savol matni, formula va izohlar bilan. " * 12 + "</p>"
+IMAGE = "/uploads/" + "ab" * 32 + ".jpg"
+
+
+def synthetic_test(questions: int):
+    """ORM-like Test object, read through attributes like a loaded row."""
+    return SimpleNamespace(
+        id=1,
+        title="Synthetic test",
+        description="Benchmark",
+        subject_id=1,
+        subject=SimpleNamespace(id=1, name="Matematika"),
+        questions=[
+            SimpleNamespace(
+                id=q + 1,
+                test_id=1,
+                text=f"{q + 1}. {TEXT}",
+                image=IMAGE if q % 3 == 0 else None,
+                options=[
+                    {
+                        "text": f"<p>Variant {o + 1}</p>",
+                        "image": IMAGE if o == 0 else None,
+                    }
+                    for o in range(4)
+                ],
+                correct_option=q % 4,
+            )
+            for q in range(questions)
+        ],
+    )
+
+
+def synthetic_results(count: int) -> List[dict]:
+    started = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i + 1,
+            "student_name": f"Talaba {i + 1}",
+            "group_id": f"GR-{i % 20 + 1}",
+            "test_title": f"Test {i % 10 + 1}",
+            "score": i % 30,
+            "taken_at": started + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1e6)
+    times = np.asarray(times)
+    return {
+        "mean_us": round(float(times.mean()), 1),
+        "min_us": round(float(times.min()), 1),
+        "p95_us": round(float(np.percentile(times, 95)), 1),
+    }
+
+
+def serialization_cases(test, results):
+    test_adapter = TypeAdapter(test_schema.Test)
+    dict_list = TypeAdapter(List[dict])
+
+    # Payload cache miss in get_test/read_tests: validate from attributes,
+    # dump straight to bytes
+    yield "test: model_validate + dump_json", lambda: (
+        test_adapter.validate_python(test, from_attributes=True).model_dump_json()
+    )
+    # What a dict-returning endpoint without response_model costs
+    as_dict = test_adapter.validate_python(test, from_attributes=True).model_dump()
+    yield "test: jsonable_encoder + json.dumps", lambda: (
+        JSONResponse(jsonable_encoder(as_dict)).body
+    )
+    yield "test: FastJSONResponse(dict)", lambda: FastJSONResponse(as_dict).body
+
+    # get_all_results before: response_model=List[dict] validation + dump
+    yield "results: List[dict] validate + dump_json", lambda: dict_list.dump_json(
+        dict_list.validate_python(results)
+    )
+    yield "results: jsonable_encoder + json.dumps", lambda: (
+        JSONResponse(jsonable_encoder(results)).body
+    )
+    yield "results: FastJSONResponse", lambda: FastJSONResponse(results).body
+
+
+def compression_cases(name, body: bytes):
+    yield f"{name}: gzip level={settings.COMPRESSION_GZIP_LEVEL}", lambda: gzip.compress(
+        body, settings.COMPRESSION_GZIP_LEVEL
+    )
+    if brotli is not None:
+        yield f"{name}: brotli quality={settings.COMPRESSION_BROTLI_QUALITY}", lambda: (
+            brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        )
+
+
+def run(args) -> dict:
+    test = synthetic_test(args.questions)
+    results = synthetic_results(args.results)
+    test_body = (
+        TypeAdapter(test_schema.Test)
+        .validate_python(test, from_attributes=True)
+        .model_dump_json()
+        .encode()
+    )
+    results_body = FastJSONResponse(results).body
+
+    report = {
+        "orjson": orjson is not None,
+        "brotli": brotli is not None,
+        "sizes": {"test": len(test_body), "results": len(results_body)},
+        "cases": {},
+    }
+    cases = [
+        *serialization_cases(test, results),
+        *compression_cases("test body", test_body),
+        *compression_cases("results body", results_body),
+    ]
+    for name, fn in cases:
+        r = report["cases"][name] = measure(fn, args.repeat)
+        output = fn()
+        if name.startswith(("test body", "results body")):
+            r["bytes"] = len(output)
+        print(
+            f"{name:45} {r['mean_us']:>10.1f} {r['min_us']:>10.1f} "
+            f"{r['p95_us']:>10.1f} {r.get('bytes', ''):>10}"
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON response benchmarks")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--results", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    print(f"{'case':45} {'mean us':>10} {'min us':>10} {'p95 us':>10} {'bytes':>10}")
+    report = run(args)
+    print(
+        f"uncompressed: test {report['sizes']['test']} B, "
+        f"results {report['sizes']['results']} B"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
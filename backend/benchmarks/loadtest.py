@@ -0,0 +1,219 @@
+"""
+Exam-day load test against a running API (uvicorn/gunicorn + Postgres).
+
+    python -m benchmarks.loadtest --fixtures bench_fixtures.json \\
+        --base-url http://localhost:8000 --window 600 --face-image face.jpg \\
+        --output run.json
+
+Every seeded student (or --students of them) arrives at a random moment
+within --window seconds and runs one exam session:
+
+    GET  /tests/summary
+    GET  /tests/{id}
+    POST /students/verify-match   (only with --face-image)
+    POST /tests/submit
+    GET  /tests/results/my
+
+Meanwhile --admins teachers poll /tests/results/all every --admin-interval
+seconds. Per endpoint the run reports request count, errors, throughput
+and p50/p95/p99 latency; --output writes the same as JSON for
+benchmarks.compare.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+API = "/api/v1"
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def request(
+        self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs
+    ):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        self.latencies[name].append(time.perf_counter() - started)
+        self.statuses[name][status] += 1
+        return response
+
+    def summary(self, duration: float) -> dict:
+        endpoints = {}
+        for name, values in sorted(self.latencies.items()):
+            ms = np.asarray(values) * 1000
+            statuses = dict(self.statuses[name])
+            errors = sum(
+                count
+                for status, count in statuses.items()
+                if not (status.isdigit() and int(status) < 400)
+            )
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": errors,
+                "statuses": statuses,
+                "throughput_rps": round(len(values) / duration, 2),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(ms.max()), 2),
+            }
+        return endpoints
+
+
+async def student_session(client, recorder, fixtures, student, face_image, delay):
+    await asyncio.sleep(delay)
+    headers = {"Authorization": f"Bearer {student['token']}"}
+    test_id = random.choice(fixtures["tests"])
+
+    await recorder.request(
+        client, "tests.summary", "GET", f"{API}/tests/summary", headers=headers
+    )
+    await recorder.request(
+        client, "tests.get", "GET", f"{API}/tests/{test_id}", headers=headers
+    )
+    if face_image is not None:
+        await recorder.request(
+            client,
+            "students.verify_match",
+            "POST",
+            f"{API}/students/verify-match",
+            headers=headers,
+            files={"file": ("face.jpg", face_image, "image/jpeg")},
+        )
+    answers = [
+        random.randrange(fixtures["options"]) for _ in range(fixtures["questions"])
+    ]
+    await recorder.request(
+        client,
+        "tests.submit",
+        "POST",
+        f"{API}/tests/submit",
+        headers=headers,
+        json={"test_id": test_id, "answers": answers},
+    )
+    await recorder.request(
+        client, "tests.results_my", "GET", f"{API}/tests/results/my", headers=headers
+    )
+
+
+async def admin_poller(client, recorder, fixtures, interval, stop: asyncio.Event):
+    headers = {"Authorization": f"Bearer {fixtures['admin_token']}"}
+    while not stop.is_set():
+        await recorder.request(
+            client,
+            "tests.results_all",
+            "GET",
+            f"{API}/tests/results/all",
+            headers=headers,
+            params={"limit": 100},
+        )
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(args) -> dict:
+    with open(args.fixtures) as f:
+        fixtures = json.load(f)
+    face_image = None
+    if args.face_image:
+        with open(args.face_image, "rb") as f:
+            face_image = f.read()
+
+    students = fixtures["students"]
+    if args.students:
+        students = students[: args.students]
+    random.seed(args.seed)
+    delays = sorted(random.uniform(0, args.window) for _ in students)
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.connections)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        stop = asyncio.Event()
+        pollers = [
+            asyncio.create_task(
+                admin_poller(client, recorder, fixtures, args.admin_interval, stop)
+            )
+            for _ in range(args.admins)
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                student_session(client, recorder, fixtures, s, face_image, d)
+                for s, d in zip(students, delays)
+            )
+        )
+        duration = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*pollers)
+
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "base_url": args.base_url,
+            "students": len(students),
+            "window_s": args.window,
+            "admins": args.admins,
+            "face_verify": face_image is not None,
+            "connections": args.connections,
+        },
+        "duration_s": round(duration, 2),
+        "endpoints": recorder.summary(duration),
+    }
+
+
+def print_report(report: dict):
+    print(
+        f"{report['config']['students']} sessions in {report['duration_s']}s "
+        f"against {report['config']['base_url']}"
+    )
+    print(
+        f"{'endpoint':24} {'reqs':>7} {'err':>5} {'rps':>8} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for name, s in report["endpoints"].items():
+        print(
+            f"{name:24} {s['requests']:>7} {s['errors']:>5} {s['throughput_rps']:>8} "
+            f"{s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exam-day load test")
+    parser.add_argument("--fixtures", default="bench_fixtures.json")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--students", type=int, help="sessions to run, default all")
+    parser.add_argument("--window", type=float, default=600, help="arrival window, s")
+    parser.add_argument("--face-image", help="photo of the enrolled face")
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--admin-interval", type=float, default=5)
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,172 @@
+"""
+Seed the database from settings.DATABASE_URL with benchmark data and write
+a fixtures file for the load test.
+
+    python -m benchmarks.seed --students 500 --tests 20 --questions 30 \\
+        --face-image face.jpg --output bench_fixtures.json
+
+Students get ids BENCH-000001.., tests are titled "Bench test N". With
+--face-image every student is enrolled with that face (plus a little
+noise), so face verification in the load test succeeds; without it the
+encodings are random. --reset removes earlier benchmark rows first.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+from app.core import security
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.models import Question, Result, Student, Test, User
+
+STUDENT_PREFIX = "BENCH-"
+TEST_PREFIX = "Bench test "
+ADMIN_USERNAME = "bench-admin"
+OPTIONS = 4
+CHUNK = 1000
+
+
+def synthetic_encodings(count: int, base=None) -> np.ndarray:
+    """Encodings shaped like dlib's: 128 floats of roughly unit norm."""
+    rng = np.random.default_rng(42)
+    if base is not None:
+        return (np.asarray(base) + rng.normal(0, 0.01, (count, 128))).astype(np.float32)
+    vectors = rng.normal(0, 1, (count, 128))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def encode_face_image(path: str):
+    # Imported lazily: only needed with --face-image
+    from app.services.face_service import encode_image_bytes
+
+    with open(path, "rb") as f:
+        encodings = encode_image_bytes(f.read())["encodings"]
+    if len(encodings) != 1 or encodings[0] is None:
+        raise SystemExit(f"{path} must contain exactly one face")
+    return encodings[0]
+
+
+async def reset(db):
+    students = select(Student.id).where(Student.student_id.like(f"{STUDENT_PREFIX}%"))
+    tests = select(Test.id).where(Test.title.like(f"{TEST_PREFIX}%"))
+    await db.execute(
+        delete(Result).where(
+            Result.student_id.in_(students) | Result.test_id.in_(tests)
+        )
+    )
+    await db.execute(delete(Question).where(Question.test_id.in_(tests)))
+    await db.execute(delete(Test).where(Test.title.like(f"{TEST_PREFIX}%")))
+    await db.execute(
+        delete(Student).where(Student.student_id.like(f"{STUDENT_PREFIX}%"))
+    )
+
+
+async def seed(args) -> dict:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    base = encode_face_image(args.face_image) if args.face_image else None
+    encodings = synthetic_encodings(args.students, base)
+
+    async with AsyncSessionLocal() as db:
+        if args.reset:
+            await reset(db)
+
+        students = []
+        for start in range(0, args.students, CHUNK):
+            values = [
+                {
+                    "full_name": f"Bench Student {i + 1}",
+                    "student_id": f"{STUDENT_PREFIX}{i + 1:06d}",
+                    "group_id": f"BENCH-{i % args.groups + 1}",
+                    "face_encoding": encodings[i],
+                    "photo_path": "stored_as_embedding",
+                }
+                for i in range(start, min(start + CHUNK, args.students))
+            ]
+            result = await db.execute(
+                insert(Student).returning(Student.id, Student.student_id), values
+            )
+            students.extend(result.all())
+
+        result = await db.execute(
+            insert(Test).returning(Test.id),
+            [
+                {"title": f"{TEST_PREFIX}{i + 1}", "description": "Benchmark"}
+                for i in range(args.tests)
+            ],
+        )
+        test_ids = result.scalars().all()
+        questions = [
+            {
+                "test_id": test_id,
+                "text": f"Question {q + 1}",
+                "options": [f"Option {o + 1}" for o in range(OPTIONS)],
+                "correct_option": random.randrange(OPTIONS),
+                "position": q,
+            }
+            for test_id in test_ids
+            for q in range(args.questions)
+        ]
+        for start in range(0, len(questions), CHUNK):
+            await db.execute(insert(Question), questions[start : start + CHUNK])
+
+        result = await db.execute(select(User).where(User.username == ADMIN_USERNAME))
+        if result.scalars().first() is None:
+            db.add(
+                User(
+                    username=ADMIN_USERNAME,
+                    hashed_password=security.get_password_hash(ADMIN_USERNAME),
+                    role="admin",
+                )
+            )
+        await db.commit()
+
+    expires = timedelta(minutes=args.token_minutes)
+    return {
+        "questions": args.questions,
+        "options": OPTIONS,
+        "tests": list(test_ids),
+        "admin_token": security.create_access_token(
+            data={"sub": ADMIN_USERNAME}, expires_delta=expires
+        ),
+        "students": [
+            {
+                "id": db_id,
+                "student_id": student_id,
+                "token": security.create_access_token(
+                    data={"sub": f"student:{student_id}", "role": "student"},
+                    expires_delta=expires,
+                ),
+            }
+            for db_id, student_id in students
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed benchmark data")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--tests", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--face-image", help="photo with one face to enroll")
+    parser.add_argument("--token-minutes", type=int, default=24 * 60)
+    parser.add_argument("--reset", action="store_true")
+    parser.add_argument("--output", default="bench_fixtures.json")
+    args = parser.parse_args()
+
+    fixtures = asyncio.run(seed(args))
+    with open(args.output, "w") as f:
+        json.dump(fixtures, f)
+    print(
+        f"Seeded {len(fixtures['students'])} students and {len(fixtures['tests'])} "
+        f"tests into {settings.DATABASE_URL.rsplit('@', 1)[-1]}, "
+        f"fixtures in {args.output}"
+    )
@@ -27,11 +27,7 @@ async def create_token():
             await db.refresh(student)
 
         token = security.create_access_token(
-            data={
-                "sub": f"student:{student.student_id}",
-                "role": "student",
-                "student_db_id": student.id,
-            },
+            data={"sub": f"student:{student.student_id}", "role": "student"},
             expires_delta=timedelta(hours=1),
         )
         print(f"TOKEN: {token}")
@@ -0,0 +1,49 @@
+"""
+gunicorn settings for running several uvicorn workers:
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Everything is driven by app settings (WEB_* and .env). The master builds
+the shared face index file once; workers map it read-only.
+"""
+
+import asyncio
+import os
+
+# Must be set before the app settings are loaded, here and in the workers
+os.environ.setdefault("FACE_INDEX_SHARED", "true")
+
+from app.core.config import settings  # noqa: E402
+
+bind = settings.WEB_BIND
+workers = settings.WEB_WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = settings.WEB_TIMEOUT
+keepalive = settings.WEB_KEEPALIVE
+# Log to stdout/stderr like plain uvicorn
+accesslog = "-"
+errorlog = "-"
+
+
+async def _build_face_index():
+    from app.core.database import AsyncSessionLocal, dispose_engines
+    from app.services.face_index import face_index
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await face_index.load(db)
+    finally:
+        # No pooled connections may be inherited by the forked workers
+        await dispose_engines()
+
+
+def on_starting(server):
+    from app.services.face_index import PREBUILT_ENV
+
+    try:
+        asyncio.run(_build_face_index())
+    except Exception as e:
+        # Workers build it themselves (e.g. the tables do not exist yet)
+        server.log.warning(f"Could not prebuild the face index: {e}")
+        return
+    os.environ[PREBUILT_ENV] = "1"
@@ -0,0 +1,28 @@
+// Uploaded question/option image. Uses the resized WebP/JPEG variants listed in
+// question.image_variants when the server provides them, so the browser picks
+// the smallest file that fits instead of downloading the original.
+const withPrefix = (srcset) => srcset.split(', ').map((entry) => `/rest${entry}`).join(', ');
+
+const QuestionImage = ({ src, variants, alt, sizes = '100vw', style }) => {
+    const variant = variants?.[src];
+
+    if (!variant) {
+        return <img src={`/rest${src}`} alt={alt} style={style} />;
+    }
+
+    return (
+        <picture>
+            <source type="image/webp" srcSet={withPrefix(variant.webp)} sizes={sizes} />
+            <img
+                src={`/rest${variant.src}`}
+                srcSet={withPrefix(variant.jpeg)}
+                sizes={sizes}
+                alt={alt}
+                style={style}
+                loading="lazy"
+            />
+        </picture>
+    );
+};
+
+export default QuestionImage;
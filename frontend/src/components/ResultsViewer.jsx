@@ -11,28 +11,40 @@ import {
     TableHead,
     TableRow,
     CircularProgress,
-    Chip
+    Chip,
+    Button
 } from '@mui/material';
 import { Assessment as AssessmentIcon } from '@mui/icons-material';
 
 export default function ResultsViewer() {
     const [results, setResults] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // Results are paginated; the next page cursor comes in X-Next-Cursor
+    const fetchResults = async (cursor = null) => {
+        try {
+            const res = await axios.get('/api/v1/tests/results/all', {
+                params: cursor ? { cursor } : {}
+            });
+            setResults(prev => cursor ? [...prev, ...res.data] : res.data);
+            setNextCursor(res.headers['x-next-cursor'] || null);
+        } catch (err) {
+            console.error(err);
+        }
+    };
 
     useEffect(() => {
-        const fetchResults = async () => {
-            try {
-                const res = await axios.get('/api/v1/tests/results/all');
-                setResults(res.data);
-            } catch (err) {
-                console.error(err);
-            } finally {
-                setLoading(false);
-            }
-        };
-        fetchResults();
+        fetchResults().finally(() => setLoading(false));
     }, []);
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        await fetchResults(nextCursor);
+        setLoadingMore(false);
+    };
+
     const getScoreColor = (score) => {
         if (score >= 80) return 'success';
         if (score >= 50) return 'warning';
@@ -104,6 +116,14 @@ export default function ResultsViewer() {
                     </TableBody>
                 </Table>
             </TableContainer>
+
+            {nextCursor && (
+                <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                    <Button variant="outlined" onClick={loadMore} disabled={loadingMore}>
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                    </Button>
+                </Box>
+            )}
         </Box>
     );
 }
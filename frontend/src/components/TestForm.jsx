@@ -72,7 +72,9 @@ export default function TestForm() {
             setSelectedSubject(test.subject_id || '');
 
             // Normalize questions
+            // Keep question ids so the backend updates questions in place
             const normalizedQuestions = test.questions.map(q => ({
+                id: q.id,
                 text: q.text,
                 image: q.image || null,
                 correct_option: q.correct_option,
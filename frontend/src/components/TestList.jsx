@@ -30,6 +30,7 @@ import {
     Visibility as VisibilityIcon,
     Quiz as QuizIcon
 } from '@mui/icons-material';
+import QuestionImage from './QuestionImage';
 
 export default function TestList() {
     const [tests, setTests] = useState([]);
@@ -183,9 +184,11 @@ export default function TestList() {
                                 </Typography>
                                 {q.image && (
                                     <Box sx={{ mb: 2 }}>
-                                        <img
-                                            src={`/rest${q.image}`}
+                                        <QuestionImage
+                                            src={q.image}
+                                            variants={q.image_variants}
                                             alt="Question"
+                                            sizes="(max-width: 900px) 100vw, 900px"
                                             style={{ maxWidth: '100%', maxHeight: '300px', borderRadius: '4px' }}
                                         />
                                     </Box>
@@ -217,9 +220,11 @@ export default function TestList() {
                                                         <div className="rich-text-content" dangerouslySetInnerHTML={{ __html: text }} />
                                                     </Typography>
                                                     {image && (
-                                                        <img
-                                                            src={`/rest${image}`}
+                                                        <QuestionImage
+                                                            src={image}
+                                                            variants={q.image_variants}
                                                             alt="Option"
+                                                            sizes="150px"
                                                             style={{ maxWidth: '150px', maxHeight: '100px', marginTop: '5px', borderRadius: '4px' }}
                                                         />
                                                     )}
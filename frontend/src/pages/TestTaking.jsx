@@ -17,6 +17,7 @@ import {
     LinearProgress
 } from '@mui/material';
 import { Send as SendIcon } from '@mui/icons-material';
+import QuestionImage from '../components/QuestionImage';
 
 export default function TestTaking() {
     const { testId } = useParams();
@@ -30,10 +31,8 @@ export default function TestTaking() {
     useEffect(() => {
         const fetchTest = async () => {
             try {
+                // Questions come in position order, which the answers follow
                 const res = await axios.get(`/api/v1/tests/${testId}`);
-                if (res.data.questions) {
-                    res.data.questions.sort((a, b) => a.id - b.id);
-                }
                 setTest(res.data);
             } catch (err) {
                 console.error(err);
@@ -90,6 +89,7 @@ export default function TestTaking() {
 
             const payload = {
                 test_id: parseInt(testId),
+                version: test.version,
                 answers: answersArray
             };
 
@@ -99,7 +99,11 @@ export default function TestTaking() {
             navigate('/student/dashboard'); // Or show result page
         } catch (err) {
             console.error(err);
-            toast.error("Submission failed. Try again.");
+            if (err.response?.status === 409) {
+                toast.error("The test was changed while you were taking it. Reload the page and answer again.");
+            } else {
+                toast.error("Submission failed. Try again.");
+            }
         } finally {
             setSubmitting(false);
         }
@@ -128,6 +132,17 @@ export default function TestTaking() {
                         <Typography variant="h6" gutterBottom sx={{ mb: 3 }} component="div">
                             <div className="rich-text-content" dangerouslySetInnerHTML={{ __html: currentQuestion.text }} />
                         </Typography>
+                        {currentQuestion.image && (
+                            <Box sx={{ mb: 3 }}>
+                                <QuestionImage
+                                    src={currentQuestion.image}
+                                    variants={currentQuestion.image_variants}
+                                    alt="Question"
+                                    sizes="(max-width: 900px) 100vw, 900px"
+                                    style={{ maxWidth: '100%', maxHeight: '400px', borderRadius: '4px' }}
+                                />
+                            </Box>
+                        )}
 
                         <FormControl component="fieldset" sx={{ width: '100%', mb: 4 }}>
                             <RadioGroup
@@ -144,10 +159,21 @@ export default function TestTaking() {
                                                 <Typography sx={{ mr: 1, fontWeight: 'bold', mt: '2px' }}>
                                                     {String.fromCharCode(65 + idx)})
                                                 </Typography>
-                                                <div
-                                                    className="rich-text-content"
-                                                    dangerouslySetInnerHTML={{ __html: typeof opt === 'string' ? opt : opt.text }}
-                                                />
+                                                <Box>
+                                                    <div
+                                                        className="rich-text-content"
+                                                        dangerouslySetInnerHTML={{ __html: typeof opt === 'string' ? opt : opt.text }}
+                                                    />
+                                                    {typeof opt === 'object' && opt.image && (
+                                                        <QuestionImage
+                                                            src={opt.image}
+                                                            variants={currentQuestion.image_variants}
+                                                            alt="Option"
+                                                            sizes="240px"
+                                                            style={{ maxWidth: '240px', maxHeight: '160px', marginTop: '5px', borderRadius: '4px' }}
+                                                        />
+                                                    )}
+                                                </Box>
                                             </Box>
                                         }
                                         sx={{